@@ -0,0 +1,338 @@
+import hashlib
+import time
+import uuid
+from typing import Callable, Iterable, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from core.caches import is_shared_cache
+from recipes.user_state import get_user_state
+from .renderers import FastJSONRenderer
+from .representations import FAST_SERIALIZERS
+from .serializers import apply_user_state
+
+CATALOG_CACHE_PREFIX = "api:catalog"
+
+RESPONSE_CACHE_PREFIX = "api:response"
+
+# Версии тегов должны видеть все воркеры, поэтому с локальным
+# кешем процесса кеш ответов выключен.
+RESPONSE_CACHE_TIMEOUT = getattr(
+    settings, "RECIPE_RESPONSE_CACHE_TIMEOUT", 300
+) if is_shared_cache() else 0
+
+# Версия справочника служит ETag. Сброс версии в локальном кеше
+# процесса не виден другим воркерам, поэтому без общего кеша версия
+# живет ограниченное время: изменения доходят до всех воркеров
+# и клиентов с If-None-Match не позже чем через этот таймаут.
+# Мгновенный сброс требует общего кеша.
+CATALOG_CACHE_TIMEOUT = None if is_shared_cache() else getattr(
+    settings, "CATALOG_LOCAL_CACHE_TIMEOUT", 60
+)
+
+REBUILD_LOCK_TIMEOUT = 10
+
+REBUILD_WAIT = 0.05
+
+REBUILD_WAIT_ATTEMPTS = 40
+
+
+class CatalogCache:
+    """
+    Кеш готового JSON справочника.
+
+    Содержимое хранится под ключом с версией справочника, версия
+    меняется сигналами моделей. Та же версия служит ETag ответа.
+    Без общего кеша версия и содержимое истекают через timeout.
+    """
+
+    def __init__(self, name: str, timeout: Optional[int] = None):
+        self.name = name
+        self.version_key = f"{CATALOG_CACHE_PREFIX}:{name}:version"
+        self.timeout = timeout
+
+    def get_version(self) -> str:
+        version = cache.get(self.version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(self.version_key, version, timeout=self.timeout):
+                version = cache.get(self.version_key, version)
+        return version
+
+    def invalidate(self) -> None:
+        cache.set(self.version_key, uuid.uuid4().hex, timeout=self.timeout)
+
+    def get_etag(self, version: str) -> str:
+        return f'"{self.name}-{version}"'
+
+    def get_content(self, version: str, build_content) -> bytes:
+        content_key = f"{CATALOG_CACHE_PREFIX}:{self.name}:{version}"
+        content = cache.get(content_key)
+        if content is None:
+            content = build_content()
+            cache.set(content_key, content, timeout=self.timeout)
+        return content
+
+
+tags_catalog = CatalogCache("tags", CATALOG_CACHE_TIMEOUT)
+
+ingredients_catalog = CatalogCache("ingredients", CATALOG_CACHE_TIMEOUT)
+
+
+class CachedCatalogMixin:
+    """
+    Список справочника из кеша с поддержкой If-None-Match.
+
+    Запросы с параметрами (фильтры, поиск) идут мимо кеша.
+    Справочник строится по строкам .values(*catalog_fields)
+    без сериализатора, если включены быстрые сериализаторы.
+    """
+    catalog: CatalogCache
+    catalog_fields: tuple[str, ...] = ()
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        version = self.catalog.get_version()
+        etag = self.catalog.get_etag(version)
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        content = self.catalog.get_content(version, self.render_catalog)
+        response = HttpResponse(content, content_type="application/json")
+        response["ETag"] = etag
+        return response
+
+    def render_catalog(self) -> bytes:
+        if FAST_SERIALIZERS and self.catalog_fields:
+            return FastJSONRenderer().render(
+                list(self.get_queryset().values(*self.catalog_fields))
+            )
+
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return JSONRenderer().render(serializer.data)
+
+
+def get_tag_version_key(tag: str) -> str:
+    return f"{RESPONSE_CACHE_PREFIX}:tag:{tag}"
+
+
+def get_tag_versions(tags: Iterable[str]) -> dict[str, Optional[str]]:
+    """Текущие версии тегов зависимостей, отсутствующие - None."""
+    tags = list(tags)
+    versions = cache.get_many([get_tag_version_key(tag) for tag in tags])
+    return {tag: versions.get(get_tag_version_key(tag)) for tag in tags}
+
+
+def ensure_tag_versions(tags: Iterable[str]) -> dict[str, str]:
+    versions = get_tag_versions(tags)
+    missing = {
+        get_tag_version_key(tag): uuid.uuid4().hex
+        for tag, version in versions.items()
+        if version is None
+    }
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        versions = get_tag_versions(versions)
+    return versions
+
+
+def invalidate_response_tags(*tags: str) -> None:
+    """
+    Меняет версии тегов после коммита транзакции.
+
+    Все ответы, зависящие от этих тегов, становятся устаревшими.
+    """
+    def bump():
+        cache.set_many(
+            {get_tag_version_key(tag): uuid.uuid4().hex for tag in tags},
+            timeout=None
+        )
+
+    transaction.on_commit(bump)
+
+
+class ResponseCache:
+    """
+    Кеш данных ответа с инвалидацией по тегам зависимостей.
+
+    Запись хранит данные и версии тегов, от которых она зависит:
+    recipes (любые изменения рецептов), recipe:<id>, author:<id>,
+    tag:<id>, ingredients. Запись верна, пока версии всех ее тегов
+    не изменились. Одновременные промахи по одному ключу ждут,
+    пока ответ построит первый запрос, а не строят его сами.
+    """
+
+    def __init__(self, timeout: int = RESPONSE_CACHE_TIMEOUT):
+        self.timeout = timeout
+
+    def get_key(self, name: str, request, **kwargs) -> str:
+        params = urlencode(
+            sorted(
+                (key, value)
+                for key, values in request.query_params.lists()
+                for value in sorted(values)
+            )
+        )
+        digest = hashlib.md5(
+            f"{request.get_host()}|{kwargs}|{params}".encode("utf-8")
+        ).hexdigest()
+        return f"{RESPONSE_CACHE_PREFIX}:{name}:{digest}"
+
+    def get_valid(self, key: str) -> Optional[dict]:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        if get_tag_versions(entry["versions"]) != entry["versions"]:
+            return None
+        return entry
+
+    def get_or_build(
+        self,
+        key: str,
+        base_tags: list[str],
+        build: Callable[[], tuple[object, list[str]]]
+    ):
+        """
+        Данные из кеша или из build().
+
+        build возвращает данные и теги, найденные в них. Версии
+        base_tags берутся до построения, поэтому изменение во время
+        построения не оставит в кеше устаревший ответ.
+        """
+        entry = self.get_valid(key)
+        if entry is not None:
+            return entry["data"]
+
+        lock_key = f"{key}:lock"
+        if not cache.add(lock_key, 1, timeout=REBUILD_LOCK_TIMEOUT):
+            for _ in range(REBUILD_WAIT_ATTEMPTS):
+                time.sleep(REBUILD_WAIT)
+                entry = self.get_valid(key)
+                if entry is not None:
+                    return entry["data"]
+                if cache.get(lock_key) is None:
+                    break
+
+        try:
+            versions = ensure_tag_versions(base_tags)
+            data, tags = build()
+            versions.update(ensure_tag_versions(set(tags) - set(versions)))
+            cache.set(
+                key,
+                {"data": data, "versions": versions},
+                timeout=self.timeout
+            )
+        finally:
+            cache.delete(lock_key)
+        return data
+
+
+def get_recipe_tags(recipe: dict) -> list[str]:
+    """Теги зависимостей рецепта, в том числе с ?fields=/?omit=."""
+    tags = [f"recipe:{recipe['id']}"]
+    if "author" in recipe:
+        tags.append(f"author:{recipe['author']['id']}")
+    tags += [f"tag:{tag_id}" for tag_id in recipe.get("tags", ())]
+    return tags
+
+
+class SharedResponseCacheMixin:
+    """
+    Общий кеш list и retrieve рецептов для всех пользователей.
+
+    Ответ строится без данных пользователя, поэтому одна запись
+    подходит всем и кешируется по нормализованным параметрам
+    запроса. Флаги пользователя (избранное, корзина, подписка)
+    накладываются на копию данных из кеша. Рецепты в ответе
+    добавляют свои теги зависимостей. Фильтры по избранному
+    и корзине зависят от пользователя и идут мимо кеша.
+    """
+    response_cache = ResponseCache()
+    personal_params = ("is_favorited", "is_in_shopping_cart")
+    building_shared_response = False
+
+    def use_response_cache(self, request) -> bool:
+        return bool(self.response_cache.timeout) and not any(
+            param in request.query_params for param in self.personal_params
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.building_shared_response:
+            context["user_state"] = None
+        return context
+
+    def build_shared_data(self, handler, request, *args, **kwargs):
+        self.building_shared_response = True
+        try:
+            return handler(request, *args, **kwargs).data
+        finally:
+            self.building_shared_response = False
+
+    def personalize(self, recipes: list[dict], request) -> list[dict]:
+        if not request.user.is_authenticated:
+            return recipes
+
+        state = get_user_state(request.user)
+        return [apply_user_state(recipe, state) for recipe in recipes]
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_response_cache(request):
+            return super().list(request, *args, **kwargs)
+
+        def build():
+            data = self.build_shared_data(
+                super(SharedResponseCacheMixin, self).list,
+                request, *args, **kwargs
+            )
+            recipes = data["results"] if isinstance(data, dict) else data
+            return data, [
+                tag for recipe in recipes for tag in get_recipe_tags(recipe)
+            ]
+
+        data = self.response_cache.get_or_build(
+            self.response_cache.get_key("recipes-list", request),
+            ["recipes", "ingredients"],
+            build
+        )
+        if isinstance(data, dict):
+            data = {
+                **data,
+                "results": self.personalize(data["results"], request)
+            }
+        else:
+            data = self.personalize(data, request)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_response_cache(request):
+            return super().retrieve(request, *args, **kwargs)
+
+        def build():
+            data = self.build_shared_data(
+                super(SharedResponseCacheMixin, self).retrieve,
+                request, *args, **kwargs
+            )
+            return data, get_recipe_tags(data)
+
+        data = self.response_cache.get_or_build(
+            self.response_cache.get_key(
+                "recipes-detail", request, **kwargs
+            ),
+            [f"recipe:{kwargs[self.lookup_field]}", "ingredients"],
+            build
+        )
+        return Response(self.personalize([data], request)[0])
@@ -0,0 +1,182 @@
+import binascii
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image, UnidentifiedImageError
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from recipes.images import get_rendition_urls
+
+BASE64_HEADER_SEPARATOR = ";base64,"
+
+# Кратно 4, чтобы каждый кусок декодировался независимо.
+CHUNK_SIZE = 64 * 1024
+
+MAX_IMAGE_SIZE = getattr(settings, "IMAGE_UPLOAD_MAX_SIZE", 10 * 1024 * 1024)
+
+MAX_IMAGE_SIDE = getattr(settings, "IMAGE_UPLOAD_MAX_SIDE", 8000)
+
+WHITESPACE = b" \t\r\n"
+
+
+class ImageRenditionsField(serializers.ReadOnlyField):
+    """
+    Ссылки на уменьшенные копии картинки рецепта.
+
+    Формат: {"thumb": {"webp": url, "jpeg": url}, "card": ..., "full": ...}.
+    Пока копии не готовы, отдается пустой словарь.
+    """
+
+    def to_representation(self, value):
+        return get_rendition_urls(value)
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """
+    Список id, проверенный одним запросом pk__in.
+
+    ManyRelatedField проверяет каждый id отдельным запросом
+    через PrimaryKeyRelatedField. Ошибки те же, что у него.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pks = []
+        for item in data:
+            if child.pk_field is not None:
+                item = child.pk_field.to_internal_value(item)
+            try:
+                if isinstance(item, bool):
+                    raise DjangoValidationError(item)
+                pks.append(queryset.model._meta.pk.to_python(item))
+            except DjangoValidationError:
+                child.fail("incorrect_type", data_type=type(item).__name__)
+
+        objects = queryset.in_bulk(pks)
+        for pk in pks:
+            if pk not in objects:
+                child.fail("does_not_exist", pk_value=pk)
+        return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField, который с many=True проверяет id разом."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
+class StreamingBase64ImageField(Base64ImageField):
+    """
+    Base64ImageField с потоковым декодированием.
+
+    Строка декодируется кусками сразу во временный файл, который
+    хранилище потом перемещает, а не копирует. Размер проверяется
+    по длине строки до декодирования, картинка - по заголовку:
+    формат и размеры без полного чтения пикселей.
+    """
+    TOO_LARGE_MESSAGE = "Размер картинки больше {max_size} байт."
+    TOO_LARGE_SIDE_MESSAGE = (
+        "Стороны картинки не должны быть больше {max_side} пикселей."
+    )
+
+    def __init__(self, *args, **kwargs):
+        self.max_size = kwargs.pop("max_size", MAX_IMAGE_SIZE)
+        self.max_side = kwargs.pop("max_side", MAX_IMAGE_SIDE)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+
+        if not isinstance(base64_data, str):
+            raise ValidationError(
+                f"Invalid type. This is not an base64 string: "
+                f"{type(base64_data)}"
+            )
+
+        start = base64_data.find(BASE64_HEADER_SEPARATOR)
+        start = 0 if start == -1 else start + len(BASE64_HEADER_SEPARATOR)
+
+        if (len(base64_data) - start) // 4 * 3 - 2 > self.max_size:
+            raise ValidationError(
+                self.TOO_LARGE_MESSAGE.format(max_size=self.max_size)
+            )
+
+        upload = TemporaryUploadedFile(
+            "image", "application/octet-stream", 0, None
+        )
+        try:
+            upload.size = self.decode_to_file(base64_data, start, upload)
+            if upload.size > self.max_size:
+                raise ValidationError(
+                    self.TOO_LARGE_MESSAGE.format(max_size=self.max_size)
+                )
+            self.inspect_image(upload)
+        except Exception:
+            upload.close()
+            raise
+
+        return serializers.FileField.to_internal_value(self, upload)
+
+    def decode_to_file(
+        self,
+        base64_data: str,
+        start: int,
+        upload: TemporaryUploadedFile
+    ) -> int:
+        size = 0
+        tail = b""
+        try:
+            for offset in range(start, len(base64_data), CHUNK_SIZE):
+                chunk = tail + base64_data[
+                    offset:offset + CHUNK_SIZE
+                ].encode("ascii").translate(None, WHITESPACE)
+                usable = len(chunk) - len(chunk) % 4
+                tail = chunk[usable:]
+                decoded = binascii.a2b_base64(chunk[:usable])
+                upload.write(decoded)
+                size += len(decoded)
+        except (binascii.Error, UnicodeEncodeError):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+
+        if tail:
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        upload.seek(0)
+        return size
+
+    def inspect_image(self, upload: TemporaryUploadedFile) -> None:
+        try:
+            image = Image.open(upload)
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+
+        extension = (image.format or "").lower()
+        extension = "jpg" if extension == "jpeg" else extension
+        if extension not in self.ALLOWED_TYPES:
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+
+        if max(image.size) > self.max_side:
+            raise ValidationError(
+                self.TOO_LARGE_SIDE_MESSAGE.format(max_side=self.max_side)
+            )
+
+        upload.seek(0)
+        upload.name = f"{self.get_file_name(None)}.{extension}"
+        upload.content_type = Image.MIME.get(image.format)
+        upload.image = image
@@ -0,0 +1,94 @@
+from typing import Iterable, Optional
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+
+OMIT_PARAM = "omit"
+
+# Поля, которые остаются в ответе при любом ?fields=/?omit=.
+REQUIRED_FIELDS = ("id",)
+
+
+def parse_field_names(request, param: str) -> Optional[list[str]]:
+    """Имена полей из ?param=a,b или ?param=a&param=b."""
+    values = request.query_params.getlist(param)
+    if not values:
+        return None
+    return [
+        name.strip()
+        for value in values
+        for name in value.split(",")
+        if name.strip()
+    ]
+
+
+def get_selected_fields(
+    request,
+    available: Iterable[str],
+    default: Optional[Iterable[str]] = None
+) -> Optional[tuple[str, ...]]:
+    """
+    Поля ответа по ?fields= и ?omit= в порядке available.
+
+    Без параметров возвращает default, None означает все поля.
+    ?omit= убирает поля из ?fields= или из default. Неизвестные
+    имена - ошибка 400, id остается в ответе всегда.
+    """
+    available = tuple(available)
+    selected = available if default is None else tuple(default)
+    if request is None:
+        return None if default is None else selected
+
+    fields = parse_field_names(request, FIELDS_PARAM)
+    omit = parse_field_names(request, OMIT_PARAM)
+    if fields is None and omit is None:
+        return None if default is None else selected
+
+    for param, names in ((FIELDS_PARAM, fields), (OMIT_PARAM, omit)):
+        unknown = set(names or ()) - set(available)
+        if unknown:
+            raise ValidationError(
+                {param: f"Неизвестные поля: {', '.join(sorted(unknown))}."}
+            )
+
+    if fields is not None:
+        selected = fields
+    selected = set(selected) - set(omit or ()) | set(REQUIRED_FIELDS)
+    return tuple(name for name in available if name in selected)
+
+
+class SparseFieldsMixin:
+    """
+    Поддержка ?fields= и ?omit= в сериализаторе верхнего уровня.
+
+    Вложенные сериализаторы отдают все поля. Представление может
+    передать уже выбранные поля в контексте под ключом fields,
+    тогда параметры запроса не разбираются повторно.
+    """
+
+    def is_top_level(self) -> bool:
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_selected_fields(self) -> Optional[tuple[str, ...]]:
+        if not hasattr(self, "_selected_fields"):
+            if not self.is_top_level():
+                self._selected_fields = None
+            elif FIELDS_PARAM in self.context:
+                self._selected_fields = self.context[FIELDS_PARAM]
+            else:
+                self._selected_fields = get_selected_fields(
+                    self.context.get("request"), self.fields
+                )
+        return self._selected_fields
+
+    @property
+    def _readable_fields(self):
+        selected = self.get_selected_fields()
+        for field in super()._readable_fields:
+            if selected is None or field.field_name in selected:
+                yield field
@@ -1,12 +1,16 @@
+from django.db.models import Case, Exists, IntegerField, OuterRef, When
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
 
-from recipes.models import Ingredient, Recipe
+from recipes.autocomplete import search_ingredient_ids
+from recipes.models import Ingredient, Recipe, RecipeTag
+from recipes.search import search_recipes
+from recipes.utils import get_tag_ids
 
 
 class IngredientFilterSet(filters.FilterSet):
     name = filters.CharFilter(
-        field_name="name",
-        lookup_expr="icontains",
+        method="filter_name",
         label="Название"
     )
 
@@ -14,6 +18,22 @@ class IngredientFilterSet(filters.FilterSet):
         model = Ingredient
         fields = ["name"]
 
+    def filter_name(self, queryset, name, value):
+        """
+        Автодополнение: сначала совпадения по началу названия,
+        затем по подстроке, не больше лимита выдачи.
+        """
+        ingredient_ids = search_ingredient_ids(value)
+        return queryset.filter(pk__in=ingredient_ids).order_by(
+            Case(
+                *[
+                    When(pk=ingredient_id, then=position)
+                    for position, ingredient_id in enumerate(ingredient_ids)
+                ],
+                output_field=IntegerField()
+            )
+        )
+
 
 class RecipeFilterSet(filters.FilterSet):
     author = filters.NumberFilter(
@@ -22,23 +42,81 @@ class RecipeFilterSet(filters.FilterSet):
         label="Автор"
     )
     is_favorited = filters.BooleanFilter(
-        field_name="is_favorited",
-        lookup_expr="exact",
+        method="filter_is_favorited",
         label="В избранных"
     )
     is_in_shopping_cart = filters.BooleanFilter(
-        field_name="is_in_shopping_cart",
-        lookup_expr="exact",
+        method="filter_is_in_shopping_cart",
         label="В корзине покупок"
     )
     tags = filters.CharFilter(
-        field_name="tags__slug",
-        lookup_expr="icontains",
+        method="filter_tags",
         label="Теги"
     )
 
     class Meta:
         model = Recipe
         fields = [
-            "author", "is_favorited", "is_in_shopping_cart", "tags__slug"
+            "author", "is_favorited", "is_in_shopping_cart", "tags"
         ]
+
+    def filter_is_favorited(self, queryset, name, value):
+        return self.filter_user_recipes(queryset, "favorite", value)
+
+    def filter_is_in_shopping_cart(self, queryset, name, value):
+        return self.filter_user_recipes(queryset, "shoppingcart", value)
+
+    def filter_user_recipes(self, queryset, relation, value):
+        """
+        Рецепты из избранного или корзины пользователя.
+
+        JOIN идет от небольшой таблицы пользователя по уникальному
+        (user, recipe), поэтому строки не дублируются. У анонимного
+        пользователя таких рецептов нет.
+        """
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.none() if value else queryset
+
+        lookup = {f"{relation}__user": user}
+        if value:
+            return queryset.filter(**lookup)
+        return queryset.exclude(**lookup)
+
+    def filter_tags(self, queryset, name, value):
+        """
+        Рецепты хотя бы с одним из тегов ?tags=a&tags=b.
+
+        Слаги сопоставляются с id по кешу, фильтр - подзапрос
+        Exists по RecipeTag без JOIN и DISTINCT.
+        """
+        slugs = self.request.query_params.getlist(name) or [value]
+        tag_ids = get_tag_ids(slugs)
+        if not tag_ids:
+            return queryset.none()
+
+        return queryset.filter(
+            Exists(
+                RecipeTag.objects.filter(
+                    recipe=OuterRef("pk"),
+                    tag_id__in=tag_ids
+                )
+            )
+        )
+
+
+class RecipeSearchFilter(BaseFilterBackend):
+    """
+    Поиск рецептов по ?search= с ранжированием.
+
+    Ищет по названию, описанию, тегам и ингредиентам. На PostgreSQL
+    использует поисковый вектор с GIN-индексом.
+    """
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.search_param, "").strip()
+        if not value:
+            return queryset
+
+        return search_recipes(queryset, value)
@@ -0,0 +1,84 @@
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from recipes.exporters import CSVExporter, TextExporter, XLSXExporter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Даты, Decimal, ленивые строки и прочее отдаются JSONRenderer.
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    if orjson is not None else 0
+)
+
+
+def reject_type(value):
+    raise TypeError(f"Type is not JSON serializable: {type(value)}")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson, если он установлен.
+
+    Для строк, целых чисел, флагов, списков и словарей вывод
+    побайтно совпадает с JSONRenderer, поэтому рендерер подключается
+    только к ответам без float. Остальные типы и вывод с отступами
+    (Accept: application/json; indent=...) рендерит JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            content = orjson.dumps(
+                data, default=reject_type, option=ORJSON_OPTIONS
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # JSONRenderer экранирует разделители строк для JavaScript.
+        return content.replace(
+            "\u2028".encode("utf-8"), b"\\u2028"
+        ).replace(
+            "\u2029".encode("utf-8"), b"\\u2029"
+        )
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """
+    Рендерер формата списка покупок.
+
+    Нужен для выбора формата через ?format= или заголовок Accept.
+    Сам файл отдается потоком из представления, а ответы
+    с ошибками RecipeViewSet.finalize_response рендерит в JSON.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+class XLSXShoppingListRenderer(ShoppingListRenderer):
+    media_type = XLSXExporter.content_type
+    format = XLSXExporter.extension
+    charset = None
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = "text/csv"
+    format = CSVExporter.extension
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    media_type = "text/plain"
+    format = TextExporter.extension
@@ -0,0 +1,192 @@
+from typing import Optional
+
+from django.conf import settings
+from rest_framework import serializers
+
+from recipes.images import get_rendition_urls
+from recipes.user_state import UserRecipeState
+from .fieldsets import FIELDS_PARAM, get_selected_fields
+from .serializers import (UserRecipeGETSerializer, get_context_user_state,
+                          get_recipes_limit)
+
+FAST_SERIALIZERS = getattr(settings, "API_FAST_SERIALIZERS", True)
+
+# Поля справочников для выборки .values() в формате их сериализаторов.
+TAG_FIELDS = ("id", "name", "color", "slug")
+
+INGREDIENT_FIELDS = ("id", "name", "measurement_unit")
+
+SUBSCRIPTION_FIELDS = tuple(UserRecipeGETSerializer.Meta.fields)
+
+# Карточка рецепта в лентах: без описания и состава.
+RECIPE_CARD_FIELDS = (
+    "id", "author", "tags", "image", "image_renditions", "name",
+    "cooking_time", "is_favorited", "is_in_shopping_cart"
+)
+
+
+def get_image_url(image, request) -> Optional[str]:
+    """Ссылка на картинку, как ее отдает FileField сериализатора."""
+    if not image:
+        return None
+    url = image.url
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def user_to_dict(user, state: Optional[UserRecipeState]) -> dict:
+    if hasattr(user, "is_subscribed"):
+        is_subscribed = user.is_subscribed
+    else:
+        is_subscribed = (
+            state is not None and user.pk in state.subscribed_author_ids
+        )
+    return {
+        "id": user.pk,
+        "email": user.email,
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "is_subscribed": is_subscribed,
+    }
+
+
+def get_recipe_ingredients(recipe, request, state) -> list[dict]:
+    return [
+        {
+            "id": recipe_ingredient.ingredient.pk,
+            "amount": recipe_ingredient.amount,
+            "name": recipe_ingredient.ingredient.name,
+            "measurement_unit": recipe_ingredient.ingredient.measurement_unit,
+        }
+        for recipe_ingredient in recipe.recipes_ingredients.all()
+    ]
+
+
+# Поля RecipeSerializer в его порядке и функции их значений.
+RECIPE_FIELDS = {
+    "id": lambda recipe, request, state: recipe.pk,
+    "author": lambda recipe, request, state: user_to_dict(
+        recipe.author, state
+    ),
+    "tags": lambda recipe, request, state: [
+        tag.pk for tag in recipe.tags.all()
+    ],
+    "ingredients": get_recipe_ingredients,
+    "image": lambda recipe, request, state: get_image_url(
+        recipe.image, request
+    ),
+    "image_renditions": lambda recipe, request, state: get_rendition_urls(
+        recipe.image_renditions
+    ),
+    "name": lambda recipe, request, state: recipe.name,
+    "text": lambda recipe, request, state: recipe.text,
+    "cooking_time": lambda recipe, request, state: recipe.cooking_time,
+    "is_favorited": lambda recipe, request, state: (
+        state is not None and recipe.pk in state.favorite_ids
+    ),
+    "is_in_shopping_cart": lambda recipe, request, state: (
+        state is not None and recipe.pk in state.cart_ids
+    ),
+}
+
+
+def recipe_to_dict(
+    recipe,
+    request,
+    state: Optional[UserRecipeState],
+    fields: Optional[tuple] = None
+) -> dict:
+    """
+    Данные рецепта в формате RecipeSerializer.
+
+    Считаются только поля fields (None - все), поэтому рецепт
+    достаточно загрузить с автором и связями только для них.
+    """
+    return {
+        name: RECIPE_FIELDS[name](recipe, request, state)
+        for name in (RECIPE_FIELDS if fields is None else fields)
+    }
+
+
+def short_recipe_to_dict(recipe, request) -> dict:
+    return {
+        "id": recipe.pk,
+        "name": recipe.name,
+        "image": get_image_url(recipe.image, request),
+        "image_renditions": get_rendition_urls(recipe.image_renditions),
+        "cooking_time": recipe.cooking_time,
+    }
+
+
+def get_preview_recipes(author, request) -> list[dict]:
+    if hasattr(author, "preview_recipes"):
+        recipes = author.preview_recipes
+    else:
+        recipes = author.recipes.order_by("-pub_date")
+        recipes_limit = get_recipes_limit(request)
+        if recipes_limit is not None:
+            recipes = recipes[:recipes_limit]
+
+    return [short_recipe_to_dict(recipe, request) for recipe in recipes]
+
+
+def subscription_to_dict(
+    author,
+    request,
+    state: Optional[UserRecipeState],
+    fields: Optional[tuple] = None
+) -> dict:
+    """Данные автора из подписок в формате UserRecipeGETSerializer."""
+    data = user_to_dict(author, state)
+    if fields is None or "recipes" in fields:
+        data["recipes"] = get_preview_recipes(author, request)
+    data["recipes_count"] = author.recipes_count
+    if fields is None:
+        return data
+    return {name: data[name] for name in fields}
+
+
+class FastSerializer(serializers.BaseSerializer):
+    """
+    Сериализатор только для чтения без дерева полей DRF.
+
+    Поля ?fields=/?omit= выбираются как в SparseFieldsMixin
+    по списку available_fields.
+    """
+    available_fields: tuple[str, ...] = ()
+
+    def get_selected_fields(self) -> Optional[tuple[str, ...]]:
+        if not hasattr(self, "_selected_fields"):
+            if FIELDS_PARAM in self.context:
+                self._selected_fields = self.context[FIELDS_PARAM]
+            else:
+                self._selected_fields = get_selected_fields(
+                    self.context.get("request"), self.available_fields
+                )
+        return self._selected_fields
+
+
+class FastRecipeSerializer(FastSerializer):
+    """Вывод RecipeSerializer через recipe_to_dict."""
+    available_fields = tuple(RECIPE_FIELDS)
+
+    def to_representation(self, instance):
+        return recipe_to_dict(
+            instance,
+            self.context.get("request"),
+            get_context_user_state(self.context),
+            self.get_selected_fields()
+        )
+
+
+class FastSubscriptionSerializer(FastSerializer):
+    """Вывод UserRecipeGETSerializer через subscription_to_dict."""
+    available_fields = SUBSCRIPTION_FIELDS
+
+    def to_representation(self, instance):
+        return subscription_to_dict(
+            instance,
+            self.context.get("request"),
+            get_context_user_state(self.context),
+            self.get_selected_fields()
+        )
@@ -1,13 +1,63 @@
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import (BooleanField, OuterRef, Prefetch, QuerySet,
+                              Subquery, Value, prefetch_related_objects)
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
 
+from core.models import Task
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag)
+                            RecipeTag, ShoppingCart, Tag)
+from recipes.search import update_search_vectors
+from recipes.user_state import UserRecipeState, get_user_state
 from users.models import Subscribe, User
+from .fields import (BulkPrimaryKeyRelatedField, ImageRenditionsField,
+                     StreamingBase64ImageField)
+from .fieldsets import SparseFieldsMixin
+
+
+def get_context_user_state(context: dict) -> Optional[UserRecipeState]:
+    """
+    Состояние пользователя запроса, загруженное один раз на контекст.
+
+    Представление может передать его в контексте заранее, а для
+    общего кешируемого ответа - передать None.
+    """
+    if "user_state" not in context:
+        request = context.get("request")
+        context["user_state"] = (
+            get_user_state(request.user) if request is not None else None
+        )
+    return context["user_state"]
+
+
+def apply_user_state(recipe: dict, state: Optional[UserRecipeState]) -> dict:
+    """Копия данных рецепта с флагами пользователя для полей из ответа."""
+    recipe = dict(recipe)
+    if "author" in recipe:
+        author = recipe["author"]
+        recipe["author"] = {
+            **author,
+            "is_subscribed": (
+                state is not None
+                and author["id"] in state.subscribed_author_ids
+            ),
+        }
+    if "is_favorited" in recipe:
+        recipe["is_favorited"] = (
+            state is not None and recipe["id"] in state.favorite_ids
+        )
+    if "is_in_shopping_cart" in recipe:
+        recipe["is_in_shopping_cart"] = (
+            state is not None and recipe["id"] in state.cart_ids
+        )
+    return recipe
 
 
-class UserGETSerializer(serializers.ModelSerializer):
+class UserGETSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -19,17 +69,14 @@ class UserGETSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_is_subscribed(self, obj):
-        user = self.context.get("request").user
-        return bool(
-            user.is_authenticated
-            and Subscribe.objects.filter(
-                author=obj,
-                user=user
-            ).exists()
-        )
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
+
+        state = get_context_user_state(self.context)
+        return state is not None and obj.pk in state.subscribed_author_ids
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ["id", "name", "measurement_unit"]
@@ -37,8 +84,7 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
+    id = serializers.IntegerField(
         source="ingredient.id",
         required=True
     )
@@ -57,7 +103,7 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ["name", "measurement_unit"]
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ["id", "name", "color", "slug"]
@@ -74,18 +120,46 @@ class RecipeGETSerializer(serializers.ModelSerializer):
         many=True
     )
     image = Base64ImageField()
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Recipe
         fields = [
-            "author", "tags", "ingredients", "image",
+            "author", "tags", "ingredients", "image", "image_renditions",
             "name", "text", "cooking_time"
         ]
         read_only_fields = fields
 
 
-class RecipeSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
+# Большие колонки рецепта, которые не загружаются без их полей.
+RECIPE_DEFERRABLE_FIELDS = ("text", "image_renditions")
+
+
+def get_recipe_prefetches(fields: Optional[tuple] = None) -> list:
+    """Связи, которые читает RecipeSerializer с полями fields."""
+    prefetches = []
+    if fields is None or "tags" in fields:
+        prefetches.append("tags")
+    if fields is None or "ingredients" in fields:
+        prefetches.append(
+            Prefetch(
+                "recipes_ingredients",
+                queryset=RecipeIngredient.objects.select_related(
+                    "ingredient"
+                )
+            )
+        )
+    return prefetches
+
+
+def get_recipe_deferred_fields(fields: Optional[tuple]) -> list[str]:
+    if fields is None:
+        return []
+    return [name for name in RECIPE_DEFERRABLE_FIELDS if name not in fields]
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         required=True,
         many=True
@@ -95,65 +169,228 @@ class RecipeSerializer(serializers.ModelSerializer):
         required=True,
         many=True
     )
-    image = Base64ImageField()
+    image = StreamingBase64ImageField()
+    image_renditions = ImageRenditionsField()
     author = UserGETSerializer(read_only=True)
-    is_in_shopping_cart = serializers.BooleanField(
-        default=False,
-        read_only=True
-    )
-    is_favorited = serializers.BooleanField(
-        default=False,
-        read_only=True
-    )
+    is_in_shopping_cart = serializers.SerializerMethodField()
+    is_favorited = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = [
             "id", "author", "tags", "ingredients", "image",
-            "name", "text", "cooking_time",
+            "image_renditions", "name", "text", "cooking_time",
             "is_favorited", "is_in_shopping_cart",
         ]
         read_only_fields = ["author", "is_favorited", "is_in_shopping_cart"]
 
+    def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance], *get_recipe_prefetches(self.get_selected_fields())
+        )
+        return super().to_representation(instance)
+
+    def get_is_favorited(self, obj):
+        state = get_context_user_state(self.context)
+        return state is not None and obj.pk in state.favorite_ids
+
+    def get_is_in_shopping_cart(self, obj):
+        state = get_context_user_state(self.context)
+        return state is not None and obj.pk in state.cart_ids
+
+    def validate_ingredients(self, value):
+        ingredient_ids = [
+            recipe_ingredient["ingredient"]["id"]
+            for recipe_ingredient in value
+        ]
+
+        if len(ingredient_ids) != len(set(ingredient_ids)):
+            raise ValidationError("Ингредиенты не должны повторяться.")
+
+        existing_ids = set(
+            Ingredient.objects.filter(
+                pk__in=ingredient_ids
+            ).values_list("pk", flat=True)
+        )
+        for ingredient_id in ingredient_ids:
+            if ingredient_id not in existing_ids:
+                raise ValidationError(
+                    f'Invalid pk "{ingredient_id}" - object does not exist.'
+                )
+
+        return value
+
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        finally:
+            # Временный файл картинки удаляется сразу после сохранения.
+            image = self.validated_data.get("image")
+            if image is not None:
+                image.close()
+
+    @transaction.atomic
     def create(self, validated_data):
         recipes_ingredients_data = validated_data.pop("recipes_ingredients")
-        recipe = super().create(validated_data)
+        tags = validated_data.pop("tags")
+        recipe = Recipe.objects.create(**validated_data)
 
-        self.__add_ingredients_to_recipe(
+        self.__set_tags(recipe, tags, created=True)
+        self.__set_ingredients(
+            recipe,
             recipes_ingredients_data,
-            recipe
+            created=True
         )
+        update_search_vectors([recipe.pk])
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        recipes_ingredients_data = validated_data.pop("recipes_ingredients")
+        recipes_ingredients_data = validated_data.pop(
+            "recipes_ingredients", None
+        )
+        tags = validated_data.pop("tags", None)
 
-        self.__add_ingredients_to_recipe(
-            recipes_ingredients_data,
-            instance
+        if tags is not None:
+            self.__set_tags(instance, tags)
+        if recipes_ingredients_data is not None:
+            self.__set_ingredients(instance, recipes_ingredients_data)
+
+        recipe = super().update(instance, validated_data)
+        update_search_vectors([recipe.pk])
+        return recipe
+
+    def __set_tags(self, recipe: Recipe, tags: list[Tag], created=False):
+        """Синхронизирует RecipeTag: одна вставка и одно удаление."""
+        tag_ids = {tag.pk for tag in tags}
+        existing_ids = set() if created else set(
+            recipe.recipes_tags.values_list("tag_id", flat=True)
+        )
+
+        removed_ids = existing_ids - tag_ids
+        if removed_ids:
+            RecipeTag.objects.filter(
+                recipe=recipe,
+                tag_id__in=removed_ids
+            ).delete()
+
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag_id=tag_id)
+            for tag_id in tag_ids - existing_ids
         )
-        return super().update(instance, validated_data)
 
-    def __add_ingredients_to_recipe(
+    def __set_ingredients(
             self,
+            recipe: Recipe,
             recipes_ingredients_data: list[dict],
-            recipe: Recipe
+            created=False
     ):
-        for recipe_ingredient in recipes_ingredients_data:
-            RecipeIngredient.objects.create(
+        """
+        Синхронизирует RecipeIngredient по разнице со старым составом.
+
+        Новые ингредиенты добавляются одним bulk_create, измененные
+        количества - одним bulk_update, удаленные - одним delete.
+        """
+        amounts = {
+            recipe_ingredient["ingredient"]["id"]: recipe_ingredient["amount"]
+            for recipe_ingredient in recipes_ingredients_data
+        }
+        existing = {} if created else {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipes_ingredients.all()
+        }
+
+        removed_ids = existing.keys() - amounts.keys()
+        if removed_ids:
+            RecipeIngredient.objects.filter(
                 recipe=recipe,
-                ingredient=recipe_ingredient["ingredient"]["id"],
-                amount=recipe_ingredient["amount"]
+                ingredient_id__in=removed_ids
+            ).delete()
+
+        changed = []
+        for ingredient_id, recipe_ingredient in existing.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        RecipeIngredient.objects.bulk_update(changed, ["amount"])
+
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient_id,
+                amount=amount
             )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in existing
+        )
 
 
-class UserRecipeGETSerializer(serializers.ModelSerializer):
-    is_subscribed = serializers.SerializerMethodField()
-    recipes = RecipeSerializer(
-        many=True,
-        read_only=True
+class ShortRecipeSerializer(serializers.ModelSerializer):
+    image = Base64ImageField()
+    image_renditions = ImageRenditionsField()
+
+    class Meta:
+        model = Recipe
+        fields = ["id", "name", "image", "image_renditions", "cooking_time"]
+        read_only_fields = fields
+
+
+def get_recipes_limit(request) -> Optional[int]:
+    """Значение ?recipes_limit= или None, если не задано или некорректно."""
+    try:
+        recipes_limit = int(request.query_params.get("recipes_limit"))
+    except (TypeError, ValueError):
+        return None
+
+    return recipes_limit if recipes_limit >= 0 else None
+
+
+def get_subscriptions_queryset(
+    user,
+    recipes_limit: Optional[int],
+    with_recipes: bool = True
+) -> QuerySet:
+    """
+    Авторы из подписок user с последними рецептами для превью.
+
+    Превью подгружаются одним запросом на страницу, не больше
+    recipes_limit рецептов на автора, и только если with_recipes.
+    """
+    queryset = User.objects.filter(
+        subscribe_authors__user=user,
+    ).annotate(
+        is_subscribed=Value(True, output_field=BooleanField())
+    ).order_by("username")
+    if not with_recipes:
+        return queryset
+
+    preview_recipes = Recipe.objects.only(
+        "id", "name", "image", "image_renditions", "cooking_time",
+        "author"
+    ).order_by("-pub_date")
+    if recipes_limit is not None:
+        preview_recipes = preview_recipes.filter(
+            pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef("author")
+                ).order_by("-pub_date").values("pk")[:recipes_limit]
+            )
+        )
+
+    return queryset.prefetch_related(
+        Prefetch(
+            "recipes",
+            queryset=preview_recipes,
+            to_attr="preview_recipes"
+        )
     )
-    recipes_count = serializers.SerializerMethodField()
+
+
+class UserRecipeGETSerializer(SparseFieldsMixin,
+                              serializers.ModelSerializer):
+    is_subscribed = serializers.SerializerMethodField()
+    recipes = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -164,32 +401,27 @@ class UserRecipeGETSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
-    def get_recipes_count(self, object):
-        return Recipe.objects.filter(
-            author=object
-        ).count()
+    def get_recipes(self, obj):
+        if hasattr(obj, "preview_recipes"):
+            recipes = obj.preview_recipes
+        else:
+            recipes = obj.recipes.order_by("-pub_date")
+            recipes_limit = get_recipes_limit(self.context.get("request"))
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
+
+        return ShortRecipeSerializer(
+            recipes,
+            many=True,
+            context=self.context
+        ).data
 
     def get_is_subscribed(self, obj):
-        user = self.context.get("request").user
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
 
-        if not user.is_authenticated:
-            return False
-
-        if user == obj:
-            return False
-
-        return bool(
-            obj.subscribe_authors.filter(user=user).exists()
-        )
-
-
-class ShortRecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
-
-    class Meta:
-        model = Recipe
-        fields = ["id", "name", "image", "cooking_time"]
-        read_only_fields = fields
+        state = get_context_user_state(self.context)
+        return state is not None and obj.pk in state.subscribed_author_ids
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
@@ -317,3 +549,24 @@ class ShopingCartSerializer(serializers.ModelSerializer):
             )
 
         return super().validate(attrs)
+
+
+class TaskSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Task
+        fields = [
+            "id", "name", "status", "attempts", "created",
+            "started", "finished", "download_url"
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != Task.DONE or not (obj.result or {}).get("file"):
+            return None
+        return reverse(
+            "tasks-download",
+            kwargs={"pk": obj.pk},
+            request=self.context.get("request")
+        )
@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.loaders import ingredients_loaded
+from recipes.models import Ingredient, Recipe, RecipeIngredient, RecipeTag, Tag
+from recipes.utils import recipes_updated
+from users.models import User
+from .caching import (ingredients_catalog, invalidate_response_tags,
+                      tags_catalog)
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_tags_catalog(instance, **kwargs):
+    tags_catalog.invalidate()
+    invalidate_response_tags("recipes", f"tag:{instance.pk}")
+
+
+@receiver([post_save, post_delete, ingredients_loaded], sender=Ingredient)
+def invalidate_ingredients_catalog(**kwargs):
+    ingredients_catalog.invalidate()
+    invalidate_response_tags("ingredients")
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def invalidate_recipe_responses(instance, **kwargs):
+    invalidate_response_tags("recipes", f"recipe:{instance.pk}")
+
+
+@receiver(recipes_updated, sender=Recipe)
+def invalidate_updated_recipe_responses(recipe_ids, **kwargs):
+    if recipe_ids is None:
+        invalidate_response_tags("recipes")
+    else:
+        invalidate_response_tags(*(f"recipe:{pk}" for pk in recipe_ids))
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+@receiver([post_save, post_delete], sender=RecipeTag)
+def invalidate_recipe_relation_responses(instance, **kwargs):
+    invalidate_response_tags("recipes", f"recipe:{instance.recipe_id}")
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_author_responses(instance, **kwargs):
+    invalidate_response_tags(f"author:{instance.pk}")
@@ -0,0 +1,129 @@
+from unittest import mock
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from api.caching import ResponseCache, SharedResponseCacheMixin
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            RecipeTag, ShoppingCart, Tag)
+from users.models import Subscribe, User
+
+RECIPES_PER_AUTHOR = 4
+
+# Таймауты кеша ответов и флагов пользователя в тестах.
+CACHE_TIMEOUT = 300
+
+
+class RecipeDataMixin:
+    """
+    Данные для тестов API: авторы с рецептами, теги, ингредиенты,
+    подписки, избранное и корзина у пользователя reader.
+
+    Кеш ответов и флагов пользователя включается только при общем
+    кеше, поэтому тесты задают его состояние явно через use_caches.
+    """
+
+    @classmethod
+    def create_recipe_data(cls):
+        cls.authors = [
+            User.objects.create_user(
+                email=f"author{number}@example.com",
+                username=f"author{number}",
+                first_name="Автор",
+                last_name=f"Номер {number}",
+                password="password-123"
+            )
+            for number in range(3)
+        ]
+        cls.reader = User.objects.create_user(
+            email="reader@example.com",
+            username="reader",
+            first_name="Читатель",
+            last_name="Рецептов",
+            password="password-123"
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f"Тег {number}",
+                color=f"#00000{number}",
+                slug=f"tag-{number}"
+            )
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit="г")
+            for name in ("мука", "молоко", "масло", "соль", "сахар")
+        ]
+
+        cls.recipes = []
+        for author in cls.authors:
+            for number in range(RECIPES_PER_AUTHOR):
+                recipe = Recipe.objects.create(
+                    author=author,
+                    name=f"Рецепт {author.username} {number}",
+                    text="Описание рецепта",
+                    cooking_time=number + 1,
+                    image=f"recipes/images/{author.username}-{number}.png"
+                )
+                RecipeTag.objects.bulk_create(
+                    RecipeTag(recipe=recipe, tag=tag)
+                    for tag in cls.tags[:number % 3 + 1]
+                )
+                RecipeIngredient.objects.bulk_create(
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredient=ingredient,
+                        amount=(number + 1) * 10
+                    )
+                    for ingredient in cls.ingredients[number % 2::2]
+                )
+                cls.recipes.append(recipe)
+
+        for author in cls.authors[:2]:
+            Subscribe.objects.create(user=cls.reader, author=author)
+        Favorite.objects.create(user=cls.reader, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.reader, recipe=cls.recipes[1])
+
+    def setUp(self):
+        # Кеш ответов, справочников и флагов пользователя
+        # не переживает тест.
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def use_caches(self, enabled: bool):
+        """Включает или выключает кеш ответов и флагов на время теста."""
+        timeout = CACHE_TIMEOUT if enabled else 0
+        for patcher in (
+            mock.patch.object(
+                SharedResponseCacheMixin,
+                "response_cache",
+                ResponseCache(timeout)
+            ),
+            mock.patch("recipes.user_state.USER_STATE_TIMEOUT", timeout),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class RecipeAPITestCase(RecipeDataMixin, APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_recipe_data()
+
+
+class RecipeAPITransactionTestCase(RecipeDataMixin, APITransactionTestCase):
+    """
+    Тесты, которым нужны колбэки transaction.on_commit: сброс
+    кеша происходит после коммита, которого нет в TestCase.
+
+    Копии картинок создаются в потоке теста: пул потоков писал бы
+    в БД параллельно со следующим тестом.
+    """
+
+    def setUp(self):
+        patcher = mock.patch("recipes.images.WORKERS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.create_recipe_data()
+        super().setUp()
@@ -0,0 +1,165 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import representations, serializers
+from api.renderers import FastJSONRenderer
+from recipes.models import Recipe
+from .base import RecipeAPITestCase
+
+FIELD_PARAMS = (
+    "",
+    "fields=name,author",
+    "fields=tags,ingredients,is_favorited",
+    "omit=text,ingredients",
+    "fields=name,text&omit=text",
+)
+
+SUBSCRIPTION_PARAMS = (
+    "",
+    "recipes_limit=2",
+    "fields=username,recipes",
+    "omit=recipes",
+    "omit=recipes,email&recipes_limit=1",
+)
+
+
+class FastSerializerParityTests(RecipeAPITestCase):
+    """
+    Быстрые сериализаторы с FastJSONRenderer отдают побайтно
+    тот же JSON, что сериализаторы DRF с JSONRenderer.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        recipe = cls.recipes[0]
+        # Разделители строк JSONRenderer экранирует, orjson - нет.
+        recipe.text = "Первая строка\u2028вторая строка\u2029"
+        recipe.image_renditions = {
+            "thumb": {
+                "webp": "recipes/renditions/thumb.webp",
+                "jpeg": "recipes/renditions/thumb.jpg",
+            },
+        }
+        recipe.save(update_fields=["text", "image_renditions"])
+
+    def get_context(self, user, params: str) -> dict:
+        request = Request(
+            APIRequestFactory().get(f"/api/?{params}", HTTP_HOST="testserver")
+        )
+        request.user = user
+        return {"request": request}
+
+    def get_recipes(self) -> list:
+        return list(
+            Recipe.objects.defer("search_vector").select_related(
+                "author"
+            ).prefetch_related(
+                *serializers.get_recipe_prefetches()
+            ).order_by("-pub_date", "-id")
+        )
+
+    def assertSameContent(self, serializer_class, fast_serializer_class,
+                          get_objects, params, **kwargs):
+        for user in (AnonymousUser(), self.reader):
+            with self.subTest(user=str(user), params=params):
+                content = JSONRenderer().render(
+                    serializer_class(
+                        get_objects(),
+                        context=self.get_context(user, params),
+                        **kwargs
+                    ).data
+                )
+                fast_content = FastJSONRenderer().render(
+                    fast_serializer_class(
+                        get_objects(),
+                        context=self.get_context(user, params),
+                        **kwargs
+                    ).data
+                )
+                self.assertEqual(fast_content, content)
+
+    def test_recipe_list(self):
+        for params in FIELD_PARAMS:
+            self.assertSameContent(
+                serializers.RecipeSerializer,
+                representations.FastRecipeSerializer,
+                self.get_recipes,
+                params,
+                many=True
+            )
+
+    def test_recipe_detail(self):
+        for params in FIELD_PARAMS:
+            self.assertSameContent(
+                serializers.RecipeSerializer,
+                representations.FastRecipeSerializer,
+                lambda: next(
+                    recipe for recipe in self.get_recipes()
+                    if recipe.pk == self.recipes[0].pk
+                ),
+                params
+            )
+
+    def test_subscriptions(self):
+        for params in SUBSCRIPTION_PARAMS:
+            request = self.get_context(self.reader, params)["request"]
+            self.assertSameContent(
+                serializers.UserRecipeGETSerializer,
+                representations.FastSubscriptionSerializer,
+                lambda: list(
+                    serializers.get_subscriptions_queryset(
+                        self.reader, serializers.get_recipes_limit(request)
+                    )
+                ),
+                params,
+                many=True
+            )
+
+
+class FastResponseParityTests(RecipeAPITestCase):
+    """
+    Ответы API с API_FAST_SERIALIZERS и без него совпадают,
+    в том числе справочники по строкам .values().
+    """
+
+    def get_contents(self, path: str) -> list[bytes]:
+        contents = []
+        for fast in (False, True):
+            cache.clear()
+            with mock.patch.multiple(
+                "api.views", FAST_SERIALIZERS=fast
+            ), mock.patch.multiple("api.caching", FAST_SERIALIZERS=fast):
+                response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, response.content)
+            contents.append(response.content)
+        return contents
+
+    def assertSameResponse(self, path: str):
+        with self.subTest(path=path):
+            content, fast_content = self.get_contents(path)
+            self.assertEqual(fast_content, content)
+
+    def test_catalogs(self):
+        self.assertSameResponse("/api/tags/")
+        self.assertSameResponse("/api/ingredients/")
+
+    def test_recipes(self):
+        detail = f"/api/recipes/{self.recipes[0].pk}/"
+        for params in FIELD_PARAMS:
+            self.assertSameResponse(f"/api/recipes/?{params}")
+            self.assertSameResponse(f"{detail}?{params}")
+        self.client.force_authenticate(self.reader)
+        for params in FIELD_PARAMS:
+            self.assertSameResponse(f"/api/recipes/?{params}")
+            self.assertSameResponse(f"{detail}?{params}")
+
+    def test_subscriptions(self):
+        self.client.force_authenticate(self.reader)
+        for params in SUBSCRIPTION_PARAMS:
+            self.assertSameResponse(f"/api/users/subscriptions/?{params}")
@@ -0,0 +1,68 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .base import RecipeAPITestCase
+
+PAGE_SIZES = (1, 10)
+
+
+class RecipeQueryCountTests(RecipeAPITestCase):
+    """
+    Число запросов к БД на чтение рецептов и подписок.
+
+    Оно не должно зависеть от размера страницы: рост с page_size
+    означает, что вернулся запрос на каждую строку (N+1). Кеш ответов
+    и флагов пользователя выключен при любом бэкенде кеша, считаются
+    запросы построения ответа.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.use_caches(False)
+
+    def count_queries(self, path: str) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+
+    def assertQueriesPerPage(self, path: str, expected: int):
+        for page_size in PAGE_SIZES:
+            with self.subTest(page_size=page_size):
+                self.assertEqual(
+                    self.count_queries(f"{path}?page_size={page_size}"),
+                    expected
+                )
+
+    def test_recipe_list_anonymous(self):
+        # COUNT, страница рецептов с авторами, теги, ингредиенты.
+        self.assertQueriesPerPage("/api/recipes/", 4)
+
+    def test_recipe_list_authenticated(self):
+        # То же и id избранного, корзины и подписок пользователя.
+        self.client.force_authenticate(self.reader)
+        self.assertQueriesPerPage("/api/recipes/", 7)
+
+    def test_recipe_list_cursor(self):
+        self.assertQueriesPerPage("/api/recipes/?pagination=cursor&", 3)
+
+    def test_recipe_list_filtered_by_favorites(self):
+        self.client.force_authenticate(self.reader)
+        self.assertQueriesPerPage("/api/recipes/?is_favorited=1&", 7)
+
+    def test_recipe_detail(self):
+        path = f"/api/recipes/{self.recipes[0].pk}/"
+        self.assertNumQueries(3, lambda: self.count_queries(path))
+        self.client.force_authenticate(self.reader)
+        self.assertNumQueries(6, lambda: self.count_queries(path))
+
+    def test_subscriptions(self):
+        # COUNT, страница авторов, превью их рецептов.
+        self.client.force_authenticate(self.reader)
+        self.assertQueriesPerPage("/api/users/subscriptions/", 3)
+
+    def test_subscriptions_recipes_limit(self):
+        self.client.force_authenticate(self.reader)
+        self.assertQueriesPerPage(
+            "/api/users/subscriptions/?recipes_limit=2&", 3
+        )
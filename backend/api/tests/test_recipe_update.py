@@ -0,0 +1,188 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Ingredient, RecipeIngredient, RecipeTag
+from .base import RecipeAPITestCase
+
+
+class RecipeUpdateTests(RecipeAPITestCase):
+    """
+    PATCH рецепта синхронизирует состав и теги по разнице:
+    строки не копятся от сохранения к сохранению.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.recipes[0]
+        self.path = f"/api/recipes/{self.recipe.pk}/"
+        self.client.force_authenticate(self.recipe.author)
+
+    def patch(self, data: dict):
+        response = self.client.patch(self.path, data, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def get_amounts(self) -> dict[int, int]:
+        rows = list(
+            RecipeIngredient.objects.filter(
+                recipe=self.recipe
+            ).values_list("ingredient_id", "amount")
+        )
+        amounts = dict(rows)
+        self.assertEqual(len(rows), len(amounts), "Повторные строки состава")
+        return amounts
+
+    def get_tag_ids(self) -> set[int]:
+        return set(
+            RecipeTag.objects.filter(
+                recipe=self.recipe
+            ).values_list("tag_id", flat=True)
+        )
+
+    def patch_ingredients(self, amounts: dict[int, int]):
+        return self.patch({
+            "ingredients": [
+                {"id": ingredient_id, "amount": amount}
+                for ingredient_id, amount in amounts.items()
+            ]
+        })
+
+    def test_add_ingredient(self):
+        amounts = self.get_amounts()
+        amounts[self.ingredients[1].pk] = 5
+        self.patch_ingredients(amounts)
+        self.assertEqual(self.get_amounts(), amounts)
+
+    def test_remove_ingredient(self):
+        amounts = self.get_amounts()
+        del amounts[self.ingredients[0].pk]
+        self.patch_ingredients(amounts)
+        self.assertEqual(self.get_amounts(), amounts)
+
+    def test_change_amount(self):
+        amounts = self.get_amounts()
+        amounts[self.ingredients[0].pk] = 250
+        response = self.patch_ingredients(amounts)
+        self.assertEqual(self.get_amounts(), amounts)
+        self.assertIn(
+            {
+                "id": self.ingredients[0].pk,
+                "amount": 250,
+                "name": self.ingredients[0].name,
+                "measurement_unit": self.ingredients[0].measurement_unit,
+            },
+            response.json()["ingredients"]
+        )
+
+    def test_repeated_patch_does_not_duplicate_ingredients(self):
+        amounts = {
+            self.ingredients[0].pk: 10,
+            self.ingredients[1].pk: 20,
+        }
+        for _ in range(3):
+            self.patch_ingredients(amounts)
+        self.assertEqual(
+            RecipeIngredient.objects.filter(recipe=self.recipe).count(), 2
+        )
+        self.assertEqual(self.get_amounts(), amounts)
+
+    def test_replace_tags(self):
+        tag_ids = {self.tags[1].pk, self.tags[2].pk}
+        self.assertNotEqual(self.get_tag_ids(), tag_ids)
+        response = self.patch({"tags": sorted(tag_ids)})
+        self.assertEqual(self.get_tag_ids(), tag_ids)
+        self.assertEqual(set(response.json()["tags"]), tag_ids)
+
+    def test_unknown_tag(self):
+        response = self.client.patch(
+            self.path, {"tags": [self.tags[0].pk, 0]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {"tags": ['Invalid pk "0" - object does not exist.']}
+        )
+
+    def test_invalid_tag_type(self):
+        response = self.client.patch(
+            self.path, {"tags": [{"id": self.tags[0].pk}]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {"tags": ["Incorrect type. Expected pk value, received dict."]}
+        )
+
+
+class RecipeSaveQueryCountTests(RecipeAPITestCase):
+    """
+    Число запросов на сохранение рецепта не зависит от состава.
+    Флаги пользователя в ответе загружаются без кеша.
+    """
+
+    INGREDIENT_COUNT = 40
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f"ингредиент {number:02}", measurement_unit="г")
+            for number in range(2 * cls.INGREDIENT_COUNT)
+        )
+        cls.many_ingredients = list(
+            Ingredient.objects.filter(
+                name__startswith="ингредиент"
+            ).order_by("name")
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.use_caches(False)
+        self.recipe = self.recipes[0]
+        self.path = f"/api/recipes/{self.recipe.pk}/"
+        self.client.force_authenticate(self.recipe.author)
+
+    def count_queries(self, ingredients: list, amount: int) -> int:
+        data = {
+            "tags": [tag.pk for tag in self.tags],
+            "ingredients": [
+                {"id": ingredient.pk, "amount": amount}
+                for ingredient in ingredients
+            ],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.path, data, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+
+    def test_save_many_ingredients(self):
+        first = self.many_ingredients[:self.INGREDIENT_COUNT]
+        second = self.many_ingredients[self.INGREDIENT_COUNT // 2:][
+            :self.INGREDIENT_COUNT
+        ]
+        # Проверка id тегов и ингредиентов по одному запросу, по одному
+        # запросу на удаление, изменение и вставку строк состава.
+        # Сначала весь состав новый, затем половина заменена,
+        # у остальных изменилось количество.
+        self.assertEqual(self.count_queries(first, 10), 18)
+        self.assertEqual(self.count_queries(second, 20), 18)
+        self.assertEqual(
+            RecipeIngredient.objects.filter(recipe=self.recipe).count(),
+            self.INGREDIENT_COUNT
+        )
+
+    def test_tags_validated_by_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch(
+                self.path,
+                {"tags": [tag.pk for tag in self.tags]},
+                format="json"
+            )
+        tag_selects = [
+            query["sql"] for query in queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "recipes_tag"' in query["sql"]
+            and "WHERE" in query["sql"]
+            and "INNER JOIN" not in query["sql"]
+        ]
+        self.assertEqual(len(tag_selects), 1, tag_selects)
@@ -0,0 +1,179 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, RecipeIngredient
+from .base import RecipeAPITransactionTestCase
+
+LIST_PATH = "/api/recipes/?page_size=100"
+
+# Id избранного, корзины и подписок пользователя.
+USER_STATE_QUERIES = 3
+
+
+class ResponseCacheTests(RecipeAPITransactionTestCase):
+    """
+    Общий кеш ответов рецептов: попадание после промаха, сброс
+    по сигналам моделей после коммита и флаги пользователя,
+    наложенные на общую запись.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.use_caches(True)
+        self.recipe = self.recipes[0]
+        self.detail_path = f"/api/recipes/{self.recipe.pk}/"
+
+    def get(self, path: str, user=None) -> tuple[dict, int]:
+        """Данные ответа и число запросов к БД."""
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), len(queries)
+
+    def get_listed(self, user=None) -> dict[int, dict]:
+        data, _ = self.get(LIST_PATH, user)
+        return {recipe["id"]: recipe for recipe in data["results"]}
+
+    def get_ingredient(self, data: dict, ingredient_id: int) -> dict:
+        return next(
+            ingredient for ingredient in data["ingredients"]
+            if ingredient["id"] == ingredient_id
+        )
+
+    def assertMiss(self, path: str):
+        _, queries = self.get(path)
+        self.assertGreater(queries, 0)
+
+    def assertHit(self, path: str):
+        _, queries = self.get(path)
+        self.assertEqual(queries, 0)
+
+    def test_hit_after_miss(self):
+        for path in (LIST_PATH, self.detail_path):
+            with self.subTest(path=path):
+                self.assertMiss(path)
+                self.assertHit(path)
+
+    def test_personal_filters_bypass_cache(self):
+        path = f"{LIST_PATH}&is_favorited=1"
+        _, queries = self.get(path, self.reader)
+        _, repeated_queries = self.get(path, self.reader)
+        # Страница строится заново, из кеша - только флаги.
+        self.assertEqual(repeated_queries, queries - USER_STATE_QUERIES)
+        self.assertGreater(repeated_queries, 0)
+
+    def test_recipe_save_invalidates(self):
+        self.get(LIST_PATH)
+        self.get(self.detail_path)
+
+        self.recipe.name = "Новое название"
+        self.recipe.save()
+
+        self.assertEqual(
+            self.get_listed()[self.recipe.pk]["name"], "Новое название"
+        )
+        data, _ = self.get(self.detail_path)
+        self.assertEqual(data["name"], "Новое название")
+
+    def test_recipe_ingredient_save_invalidates(self):
+        self.get(self.detail_path)
+
+        recipe_ingredient = RecipeIngredient.objects.filter(
+            recipe=self.recipe
+        ).first()
+        recipe_ingredient.amount = 999
+        recipe_ingredient.save()
+
+        data, _ = self.get(self.detail_path)
+        self.assertEqual(
+            self.get_ingredient(
+                data, recipe_ingredient.ingredient_id
+            )["amount"],
+            999
+        )
+
+    def test_ingredient_save_invalidates(self):
+        self.get(self.detail_path)
+
+        ingredient = self.ingredients[0]
+        ingredient.name = "мука цельнозерновая"
+        ingredient.save()
+
+        data, _ = self.get(self.detail_path)
+        self.assertEqual(
+            self.get_ingredient(data, ingredient.pk)["name"],
+            "мука цельнозерновая"
+        )
+
+    def test_tag_save_invalidates(self):
+        for path in (LIST_PATH, self.detail_path):
+            self.get(path)
+
+        tag = self.tags[0]
+        tag.name = "Новый тег"
+        tag.save()
+
+        for path in (LIST_PATH, self.detail_path):
+            with self.subTest(path=path):
+                self.assertMiss(path)
+
+    def test_tag_delete_invalidates(self):
+        self.get(self.detail_path)
+
+        tag = self.tags[0]
+        tag.delete()
+
+        data, _ = self.get(self.detail_path)
+        self.assertNotIn(tag.pk, data["tags"])
+
+    def test_user_flags_on_shared_page(self):
+        self.get(LIST_PATH, self.reader)
+
+        # Другие пользователи получают ту же запись без своих флагов
+        # из чужого ответа: запросы только за их состоянием.
+        other_user = self.authors[2]
+        data, queries = self.get(LIST_PATH, other_user)
+        self.assertEqual(queries, USER_STATE_QUERIES)
+        for recipe in data["results"]:
+            self.assertFalse(recipe["is_favorited"])
+            self.assertFalse(recipe["is_in_shopping_cart"])
+            self.assertFalse(recipe["author"]["is_subscribed"])
+
+        anonymous = self.get_listed()
+        for recipe in anonymous.values():
+            self.assertFalse(recipe["is_favorited"])
+            self.assertFalse(recipe["is_in_shopping_cart"])
+            self.assertFalse(recipe["author"]["is_subscribed"])
+
+        subscribed_ids = {author.pk for author in self.authors[:2]}
+        listed = self.get_listed(self.reader)
+        for recipe_id, recipe in listed.items():
+            self.assertEqual(
+                recipe["is_favorited"], recipe_id == self.recipes[0].pk
+            )
+            self.assertEqual(
+                recipe["is_in_shopping_cart"],
+                recipe_id == self.recipes[1].pk
+            )
+            self.assertEqual(
+                recipe["author"]["is_subscribed"],
+                recipe["author"]["id"] in subscribed_ids
+            )
+
+    def test_user_flags_follow_changes(self):
+        recipe = self.recipes[5]
+        self.assertFalse(
+            self.get_listed(self.reader)[recipe.pk]["is_favorited"]
+        )
+
+        Favorite.objects.create(user=self.reader, recipe=recipe)
+
+        # Запись кеша остается, заново загружаются только флаги.
+        data, queries = self.get(LIST_PATH, self.reader)
+        self.assertEqual(queries, USER_STATE_QUERIES)
+        listed = {recipe["id"]: recipe for recipe in data["results"]}
+        self.assertTrue(listed[recipe.pk]["is_favorited"])
+        self.assertFalse(
+            self.get_listed(self.authors[2])[recipe.pk]["is_favorited"]
+        )
@@ -0,0 +1,47 @@
+from recipes.models import Recipe
+from recipes.search import update_all_search_vectors
+from .base import RecipeAPITestCase
+
+
+class RecipeSearchTests(RecipeAPITestCase):
+    """
+    Поиск по ?search= находит рецепты по новому названию тега
+    или ингредиента сразу после переименования.
+    """
+
+    def setUp(self):
+        super().setUp()
+        update_all_search_vectors()
+
+    def search(self, value: str) -> set[int]:
+        response = self.client.get(
+            "/api/recipes/", {"search": value, "page_size": 100}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return {recipe["id"] for recipe in response.json()["results"]}
+
+    def test_renamed_ingredient(self):
+        ingredient = self.ingredients[0]
+        ingredient.name = "киноа"
+        ingredient.save()
+        self.assertEqual(
+            self.search("киноа"),
+            set(
+                Recipe.objects.filter(
+                    recipes_ingredients__ingredient=ingredient
+                ).values_list("pk", flat=True)
+            )
+        )
+
+    def test_renamed_tag(self):
+        tag = self.tags[2]
+        tag.name = "Завтрак"
+        tag.save()
+        self.assertEqual(
+            self.search("Завтрак"),
+            set(
+                Recipe.objects.filter(
+                    recipes_tags__tag=tag
+                ).values_list("pk", flat=True)
+            )
+        )
@@ -7,7 +7,7 @@ router = routers.DefaultRouter()
 router.register(
     'ingredients',
     views.IngredientViewSet,
-    basename='recipes'
+    basename='ingredients'
 )
 router.register(
     'recipes',
@@ -24,6 +24,21 @@ router.register(
     views.UserViewSet,
     basename='users'
 )
+router.register(
+    'db-stats',
+    views.DatabaseStatsViewSet,
+    basename='db-stats'
+)
+router.register(
+    'profiling',
+    views.ProfilingStatsViewSet,
+    basename='profiling'
+)
+router.register(
+    'tasks',
+    views.TaskViewSet,
+    basename='tasks'
+)
 
 
 urlpatterns = [
@@ -1,22 +1,49 @@
-from django.db.models import BooleanField, Case, Exists, OuterRef, Value, When
-from django.http import HttpResponse
-from django.shortcuts import get_list_or_404, get_object_or_404
+from itertools import chain
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
-from rest_framework import filters, status
+from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.viewsets import GenericViewSet, ModelViewSet, mixins
 
+from core.db.pool import get_database_stats
+from core.models import Task
+from core.profiling import stats as profile_stats
+from core.tasks import enqueue
+from recipes.exporters import EXPORTERS, get_exporter
+from recipes.feed import FEED_CACHE_TIMEOUT, filter_feed, get_feed_head_ids
 from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
-from recipes.utils import get_xls_recipes_file
+from recipes.utils import get_shopping_list
 from users.models import Subscribe
 from . import serializers
-from .filters import IngredientFilterSet, RecipeFilterSet
-from .paginations import CustomPagination
+from .caching import (CachedCatalogMixin, SharedResponseCacheMixin,
+                      ingredients_catalog, tags_catalog)
+from .fieldsets import FIELDS_PARAM, get_selected_fields
+from .filters import IngredientFilterSet, RecipeFilterSet, RecipeSearchFilter
+from .paginations import (CustomPagination, KeysetPagination,
+                          RecipePagination)
 from .permissions import (IsAuthenticatedReadOnlyOrAuthor,
                           ReadOnlyOrCreateUserOrUpdateProfile)
+from .renderers import (CSVShoppingListRenderer, FastJSONRenderer,
+                        ShoppingListRenderer, TextShoppingListRenderer,
+                        XLSXShoppingListRenderer)
+from .representations import (FAST_SERIALIZERS, INGREDIENT_FIELDS,
+                              RECIPE_CARD_FIELDS, SUBSCRIPTION_FIELDS,
+                              TAG_FIELDS, FastRecipeSerializer,
+                              FastSubscriptionSerializer)
+
+TASK_POLL_INTERVAL = getattr(settings, "TASK_POLL_INTERVAL", 1)
 
 
 class UserViewSet(DjoserUserViewSet):
@@ -30,7 +57,8 @@ class UserViewSet(DjoserUserViewSet):
         methods=["GET"],
         url_path="subscriptions",
         url_name="Subscriptions",
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[FastJSONRenderer, BrowsableAPIRenderer]
     )
     def get_subscriptions(self, request):
         """
@@ -38,23 +66,36 @@ class UserViewSet(DjoserUserViewSet):
 
         Получение листа подписок.
         """
-        queryset = self.get_queryset().filter(
-            subscribe_authors__user=request.user,
+        fields = get_selected_fields(request, SUBSCRIPTION_FIELDS)
+        queryset = serializers.get_subscriptions_queryset(
+            request.user,
+            serializers.get_recipes_limit(request),
+            with_recipes=fields is None or "recipes" in fields
         )
+        serializer_class = (
+            FastSubscriptionSerializer if FAST_SERIALIZERS
+            else serializers.UserRecipeGETSerializer
+        )
+        # is_subscribed уже в выборке, флаги пользователя не нужны.
+        context = {
+            "request": request,
+            FIELDS_PARAM: fields,
+            "user_state": None
+        }
 
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = serializers.UserRecipeGETSerializer(
+            serializer = serializer_class(
                 page,
                 many=True,
-                context={"request": request}
+                context=context
             )
             return self.get_paginated_response(serializer.data)
 
-        serializer = serializers.UserRecipeGETSerializer(
+        serializer = serializer_class(
             queryset,
             many=True,
-            context={"request": request}
+            context=context
         )
         return Response(serializer.data)
 
@@ -100,9 +141,12 @@ class UserViewSet(DjoserUserViewSet):
         )
 
 
-class IngredientViewSet(GenericViewSet,
+class IngredientViewSet(CachedCatalogMixin,
+                        GenericViewSet,
                         mixins.ListModelMixin,
                         mixins.RetrieveModelMixin):
+    catalog = ingredients_catalog
+    catalog_fields = INGREDIENT_FIELDS
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
     pagination_class = None
@@ -110,46 +154,74 @@ class IngredientViewSet(GenericViewSet,
     filterset_class = IngredientFilterSet
 
 
-class RecipeViewSet(ModelViewSet):
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter)
+class RecipeViewSet(SharedResponseCacheMixin, ModelViewSet):
+    filter_backends = (DjangoFilterBackend, RecipeSearchFilter, OrderingFilter)
     filterset_class = RecipeFilterSet
+    ordering_fields = ["pub_date", "popularity"]
+    pagination_class = RecipePagination
     permission_classes = [IsAuthenticatedReadOnlyOrAuthor]
     serializer_class = serializers.RecipeSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    read_actions = ("list", "retrieve", "trending", "feed")
+    # Ленты по умолчанию отдают компактные карточки рецептов.
+    card_actions = ("trending", "feed")
 
-    def get_queryset(self):
-        user = self.request.user
-        queryset = Recipe.objects.all()
-
-        if user.is_authenticated:
-            queryset = queryset.annotate(
-                is_favorited=Case(
-                    When(
-                        Exists(
-                            Favorite.objects.filter(
-                                recipe=OuterRef('pk'), user=user
-                            )
-                        ),
-                        then=Value(True)
-                    ),
-                    default=Value(False),
-                    output_field=BooleanField()
-                ),
-                is_in_shopping_cart=Case(
-                    When(
-                        Exists(
-                            ShoppingCart.objects.filter(
-                                recipe=OuterRef('pk'), user=user
-                            )
-                        ),
-                        then=Value(True)
-                    ),
-                    default=Value(False),
-                    output_field=BooleanField()
+    def get_selected_fields(self):
+        """Поля рецепта по ?fields=/?omit=, None - все поля."""
+        if not hasattr(self, "_selected_fields"):
+            self._selected_fields = None
+            if self.action in self.read_actions:
+                self._selected_fields = get_selected_fields(
+                    self.request,
+                    serializers.RecipeSerializer.Meta.fields,
+                    RECIPE_CARD_FIELDS
+                    if self.action in self.card_actions else None
                 )
-            )
+        return self._selected_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context[FIELDS_PARAM] = self.get_selected_fields()
+        return context
+
+    def get_serializer_class(self):
+        if (
+            FAST_SERIALIZERS
+            and self.action in self.read_actions
+            and self.request.method == "GET"
+        ):
+            return FastRecipeSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = Recipe.objects.defer("search_vector")
+
+        if self.action in self.read_actions:
+            queryset = self.get_read_queryset(queryset)
 
         return queryset
 
+    def get_read_queryset(self, queryset):
+        """
+        План запроса для list/retrieve.
+
+        Автор подгружается через JOIN, теги и ингредиенты -
+        одним запросом на страницу каждый. Избранное, корзина
+        и подписки пользователя не попадают в запрос: флаги
+        проставляются сериализатором по закешированным id.
+        Число запросов не зависит от размера страницы.
+        Связи и большие колонки полей, которых нет в ответе
+        (?fields=/?omit=), не загружаются.
+        """
+        fields = self.get_selected_fields()
+        if fields is None or "author" in fields:
+            queryset = queryset.select_related("author")
+        return queryset.prefetch_related(
+            *serializers.get_recipe_prefetches(fields)
+        ).defer(
+            *serializers.get_recipe_deferred_fields(fields)
+        )
+
     def perform_create(self, serializer):
         serializer.save(
             author=self.request.user
@@ -157,14 +229,100 @@ class RecipeViewSet(ModelViewSet):
 
     def perform_update(self, serializer):
         serializer.save(
-            ingredients=self.request.data.get("ingredients"),
             author=self.request.user
         )
 
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Ошибки скачивания списка покупок отдаются в JSON.
+
+        Рендереры файлов выбираются по ?format=, но тело ошибки
+        с типом text/csv или xlsx клиент не разберет.
+        """
+        if (
+            isinstance(response, Response)
+            and response.status_code >= 400
+            and isinstance(
+                getattr(request, "accepted_renderer", None),
+                ShoppingListRenderer
+            )
+        ):
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
+
     @action(
         detail=False,
         methods=["GET"],
         permission_classes=[IsAuthenticated],
+        pagination_class=KeysetPagination,
+        url_path="feed",
+        url_name="Feed"
+    )
+    def feed(self, request):
+        """
+        Создает endpoint api/recipes/feed/.
+
+        Лента рецептов авторов из подписок, от новых к старым,
+        с keyset-пагинацией. Первая страница берется по id
+        из кеша ленты пользователя.
+        """
+        queryset = filter_feed(
+            self.filter_queryset(self.get_queryset()),
+            request.user
+        )
+
+        if FEED_CACHE_TIMEOUT and not request.query_params:
+            head_size = self.paginator.page_size + 1
+            feed_ids = get_feed_head_ids(
+                request.user.pk,
+                lambda: list(
+                    queryset.order_by(
+                        "-pub_date", "-id"
+                    ).values_list("pk", flat=True)[:head_size]
+                )
+            )
+            queryset = queryset.filter(pk__in=feed_ids)
+
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        )
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path="trending",
+        url_name="Trending"
+    )
+    def trending(self, request):
+        """
+        Создает endpoint api/recipes/trending/.
+
+        Лента рецептов по популярности, которую периодически
+        пересчитывает команда update_popularity.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by(
+            "-popularity", "-pub_date", "-id"
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            XLSXShoppingListRenderer,
+            CSVShoppingListRenderer,
+            TextShoppingListRenderer
+        ],
         url_path="download_shopping_cart",
         url_name="Download shopping cart"
     )
@@ -172,24 +330,69 @@ class RecipeViewSet(ModelViewSet):
         """
         Создает endpoint api/recipes/download_shopping_cart/.
 
-        Скачивание файла xls с информацией рецептов
-        из корзины покупок.
+        Потоковое скачивание сводного списка ингредиентов
+        из корзины покупок. Формат выбирается параметром
+        ?format= (xlsx, csv, txt), по умолчанию xlsx.
         """
-        recipes = get_list_or_404(
-            Recipe,
-            shoppingcart__user=self.request.user
-        )
+        ingredients = get_shopping_list(request.user).iterator()
+        first_ingredient = next(ingredients, None)
+        if first_ingredient is None:
+            raise Http404("Корзина покупок пуста.")
 
-        response = HttpResponse(content_type="application/ms-excel")
+        exporter = get_exporter(request.accepted_renderer.format)(
+            chain([first_ingredient], ingredients)
+        )
+        response = StreamingHttpResponse(
+            exporter,
+            content_type=exporter.content_type
+        )
         response["Content-Disposition"] = (
-            'attachment; filename="shopping-list.xls"'
+            f'attachment; filename="{exporter.filename}"'
         )
-        response["Content-Type"] = "application/ms-excel; charset=utf-8"
-
-        workbook = get_xls_recipes_file(recipes)
-        workbook.save(response)
         return response
 
+    @action(
+        detail=False,
+        methods=["POST"],
+        permission_classes=[IsAuthenticated],
+        url_path="download_shopping_cart/export",
+        url_name="Export shopping cart"
+    )
+    def export_shopping_cart(self, request):
+        """
+        Создает endpoint api/recipes/download_shopping_cart/export/.
+
+        Ставит выгрузку списка покупок в очередь фоновых задач.
+        Формат передается полем format (xlsx, csv, txt). Статус
+        задачи и ссылка на файл - по адресу из заголовка Location.
+        """
+        export_format = request.data.get("format", "xlsx")
+        if export_format not in EXPORTERS:
+            raise ValidationError(
+                {"format": f"Доступные форматы: {', '.join(EXPORTERS)}."}
+            )
+        if not ShoppingCart.objects.filter(user=request.user).exists():
+            raise Http404("Корзина покупок пуста.")
+
+        task = enqueue(
+            "export_shopping_list",
+            {"user_id": request.user.pk, "export_format": export_format},
+            user=request.user
+        )
+        serializer = serializers.TaskSerializer(
+            task,
+            context={"request": request}
+        )
+        return Response(
+            data=serializer.data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={
+                "Location": reverse(
+                    "tasks-detail", kwargs={"pk": task.pk}, request=request
+                )
+            }
+        )
+
     @action(
         detail=True,
         methods=["POST"],
@@ -273,10 +476,115 @@ class RecipeViewSet(ModelViewSet):
         )
 
 
-class TagViewSet(GenericViewSet,
+class TagViewSet(CachedCatalogMixin,
+                 GenericViewSet,
                  mixins.ListModelMixin,
                  mixins.RetrieveModelMixin):
+    catalog = tags_catalog
+    catalog_fields = TAG_FIELDS
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
     pagination_class = None
     permission_classes = [AllowAny]
+
+
+class DatabaseStatsViewSet(GenericViewSet):
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        """
+        Создает endpoint api/db-stats/.
+
+        Настройки соединений с БД и статистика пула
+        соединений текущего процесса.
+        """
+        return Response(get_database_stats())
+
+
+class ProfilingStatsViewSet(GenericViewSet):
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        """
+        Создает endpoint api/profiling/.
+
+        Перцентили времени, числа запросов к БД и размера ответа
+        по представлениям за последние замеры текущего процесса.
+        """
+        return Response(profile_stats.get_summary())
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        url_path="reset",
+        url_name="Reset"
+    )
+    def reset(self, request):
+        """
+        Создает endpoint api/profiling/reset/.
+
+        Сбрасывает накопленную статистику.
+        """
+        profile_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TaskViewSet(GenericViewSet):
+    serializer_class = serializers.TaskSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Task.objects.filter(user=self.request.user)
+
+    def retrieve(self, request, pk=None):
+        """
+        Создает endpoint api/tasks/{pk}/.
+
+        Статус фоновой задачи пользователя. ETag меняется вместе
+        со статусом, поэтому опрос с If-None-Match получает 304,
+        пока задача не продвинулась.
+        """
+        task = self.get_object()
+        etag = f'"task-{task.pk}-{task.status}-{task.attempts}"'
+        headers = {"ETag": etag}
+        if task.status in (Task.PENDING, Task.RUNNING):
+            headers["Retry-After"] = str(max(int(TASK_POLL_INTERVAL), 1))
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            for header, value in headers.items():
+                not_modified[header] = value
+            return not_modified
+
+        return Response(self.get_serializer(task).data, headers=headers)
+
+    @action(
+        detail=True,
+        methods=["GET"],
+        url_path="download",
+        url_name="download"
+    )
+    def download(self, request, pk=None):
+        """
+        Создает endpoint api/tasks/{pk}/download/.
+
+        Отдает файл, созданный задачей.
+        """
+        task = self.get_object()
+        result = task.result or {}
+        if task.status != Task.DONE or not result.get("file"):
+            return Response(
+                {"detail": "Результат задачи еще не готов."},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        try:
+            file = default_storage.open(result["file"], "rb")
+        except FileNotFoundError:
+            raise Http404("Файл результата удален.")
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=result["filename"],
+            content_type=result["content_type"]
+        )
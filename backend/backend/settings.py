@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +55,13 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'backend.urls'
 
+# Доля запросов, для которых ProfilingMiddleware делает замеры.
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0.1))
+
+PROFILING_N_PLUS_ONE_THRESHOLD = int(
+    os.getenv('PROFILING_N_PLUS_ONE_THRESHOLD', 5)
+)
+
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
@@ -74,14 +82,55 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# При включенном пуле соединение возвращается в него после каждого
+# запроса, поэтому CONN_MAX_AGE не используется.
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 0))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': (
+            0 if DB_POOL_MAX_SIZE
+            else int(os.getenv('DB_CONN_MAX_AGE', 60))
+        ),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+        ),
+        'POOL': {
+            'MAX_SIZE': DB_POOL_MAX_SIZE,
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        },
+    }
+}
+
+# DB_ENGINE=sqlite - локальный запуск и бенчмарки без PostgreSQL.
+if os.getenv('DB_ENGINE') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+
+# Кеш должен быть общим для всех воркеров gunicorn, в docker-compose
+# это memcached (PyMemcacheCache). С LocMemCache по умолчанию кеш
+# ответов рецептов, лент, флагов пользователя и слагов тегов выключен,
+# автодополнение ингредиентов ищет по БД без дерева в памяти,
+# а справочники обновляются с задержкой CATALOG_LOCAL_CACHE_TIMEOUT.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
     }
 }
 
@@ -120,6 +169,64 @@ STATICFILES_DIRS = [
 
 INGREDIENTS_DIR = os.path.join(BASE_DIR, 'data/ingredients')
 
+INGREDIENT_AUTOCOMPLETE_LIMIT = int(
+    os.getenv('INGREDIENT_AUTOCOMPLETE_LIMIT', 20)
+)
+
+INGREDIENT_AUTOCOMPLETE_TRIE = (
+    os.getenv('INGREDIENT_AUTOCOMPLETE_TRIE', 'True') == 'True'
+)
+
+POPULARITY_HALF_LIFE_HOURS = float(
+    os.getenv('POPULARITY_HALF_LIFE_HOURS', 72)
+)
+
+POPULARITY_WINDOW_DAYS = int(os.getenv('POPULARITY_WINDOW_DAYS', 30))
+
+RECIPE_RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv('RECIPE_RESPONSE_CACHE_TIMEOUT', 300)
+)
+
+# Без общего кеша: через сколько секунд справочники тегов
+# и ингредиентов и их ETag обновляются в остальных воркерах.
+CATALOG_LOCAL_CACHE_TIMEOUT = int(
+    os.getenv('CATALOG_LOCAL_CACHE_TIMEOUT', 60)
+)
+
+RECIPE_FEED_CACHE_TIMEOUT = int(os.getenv('RECIPE_FEED_CACHE_TIMEOUT', 300))
+
+USER_STATE_CACHE_TIMEOUT = int(os.getenv('USER_STATE_CACHE_TIMEOUT', 600))
+
+API_FAST_SERIALIZERS = (
+    os.getenv('API_FAST_SERIALIZERS', 'True') == 'True'
+)
+
+RECIPE_SEARCH_CONFIG = os.getenv('RECIPE_SEARCH_CONFIG', 'russian')
+
+IMAGE_UPLOAD_MAX_SIZE = int(
+    os.getenv('IMAGE_UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+)
+
+IMAGE_UPLOAD_MAX_SIDE = int(os.getenv('IMAGE_UPLOAD_MAX_SIDE', 8000))
+
+IMAGE_RENDITION_QUALITY = int(os.getenv('IMAGE_RENDITION_QUALITY', 80))
+
+IMAGE_RENDITION_WORKERS = int(os.getenv('IMAGE_RENDITION_WORKERS', 2))
+
+IMAGE_RENDITION_QUEUE = (
+    os.getenv('IMAGE_RENDITION_QUEUE', 'False') == 'True'
+)
+
+TASK_MAX_ATTEMPTS = int(os.getenv('TASK_MAX_ATTEMPTS', 3))
+
+TASK_RETRY_DELAY = int(os.getenv('TASK_RETRY_DELAY', 10))
+
+TASK_TIMEOUT = int(os.getenv('TASK_TIMEOUT', 600))
+
+TASK_RESULT_TTL = int(os.getenv('TASK_RESULT_TTL', 24 * 60 * 60))
+
+TASK_POLL_INTERVAL = float(os.getenv('TASK_POLL_INTERVAL', 1))
+
 MEDIA_URL = 'https://foodgramajsen.ddns.net/media/'
 
 MEDIA_ROOT = BASE_DIR / 'media'
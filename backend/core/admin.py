@@ -0,0 +1,23 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = [
+        "id", "name", "status", "attempts", "user", "created", "finished"
+    ]
+    list_filter = ["status", "name"]
+    search_fields = ["name", "user__username"]
+    readonly_fields = ["started", "finished", "worker", "error", "result"]
+    actions = ["retry"]
+
+    @admin.action(description="Повторить задачи")
+    def retry(self, request, queryset):
+        queryset.exclude(status=Task.RUNNING).update(
+            status=Task.PENDING,
+            attempts=0,
+            run_after=timezone.now()
+        )
@@ -0,0 +1,365 @@
+import base64
+import io
+import json
+import statistics
+import time
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import representations, serializers
+from api.renderers import FastJSONRenderer
+from core.profiling import percentile
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+HOST = "localhost"
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Scenario:
+    """
+    Один сценарий бенчмарка: запрос к API через тестовый клиент.
+
+    Сценарии с записью выполняются в транзакции, которая
+    откатывается, поэтому данные между прогонами не меняются.
+    Кеш очищается перед каждым запуском: замеряется построение
+    ответа, а не попадание в кеш ответов.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        request: Callable[[Client], object],
+        write: bool = False,
+        cleanup: Optional[Callable] = None
+    ):
+        self.name = name
+        self.request = request
+        self.write = write
+        self.cleanup = cleanup
+
+    def run_once(self, client: Client) -> tuple[float, int]:
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            if self.write:
+                with transaction.atomic():
+                    response = self.request(client)
+                    transaction.set_rollback(True)
+            else:
+                response = self.request(client)
+                # Потоковый ответ читается целиком, как клиентом.
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+
+        if response.status_code >= 400:
+            raise BenchmarkError(
+                f"{self.name}: HTTP {response.status_code}"
+            )
+        if self.cleanup is not None:
+            self.cleanup(response)
+        return elapsed * 1000, len(queries)
+
+    def run(self, client: Client, repeat: int, warmup: int) -> dict:
+        for _ in range(warmup):
+            self.run_once(client)
+
+        latencies = []
+        query_counts = []
+        for _ in range(repeat):
+            latency, query_count = self.run_once(client)
+            latencies.append(latency)
+            query_counts.append(query_count)
+
+        return {
+            "median_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "queries": max(query_counts),
+        }
+
+
+def get_image() -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", (600, 400), "green").save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def delete_uploaded_image(response) -> None:
+    """Откат транзакции не удаляет файл картинки, он удаляется явно."""
+    image_url = response.json()["image"]
+    default_storage.delete(image_url.split(settings.MEDIA_URL, 1)[-1])
+
+
+def get_scenarios(user: User) -> list[Scenario]:
+    """Сценарии для горячих путей API от имени пользователя user."""
+    tag_slugs = list(
+        Tag.objects.order_by("pk").values_list("slug", flat=True)
+    )
+    ingredient_ids = list(
+        Ingredient.objects.order_by("pk").values_list("pk", flat=True)[:10]
+    )
+    recipe = Recipe.objects.filter(author=user).order_by("pk").first()
+    if recipe is None or not tag_slugs:
+        raise BenchmarkError(
+            "Нет данных, сначала запустите seed_benchmark_data."
+        )
+
+    image = get_image()
+    recipe_data = {
+        "name": "Бенчмарк",
+        "text": "Рецепт для бенчмарка",
+        "cooking_time": 30,
+        "image": image,
+        "tags": list(
+            Tag.objects.filter(
+                slug__in=tag_slugs[:2]
+            ).values_list("pk", flat=True)
+        ),
+        "ingredients": [
+            {"id": ingredient_id, "amount": 100}
+            for ingredient_id in ingredient_ids
+        ],
+    }
+    update_data = {
+        key: value for key, value in recipe_data.items() if key != "image"
+    }
+
+    def get(path):
+        return lambda client: client.get(path)
+
+    return [
+        Scenario("recipes_list", get("/api/recipes/")),
+        Scenario("recipes_list_page_10", get("/api/recipes/?page=10")),
+        Scenario(
+            "recipes_list_cursor",
+            get("/api/recipes/?pagination=cursor")
+        ),
+        Scenario(
+            "recipes_filter_tags",
+            get(f"/api/recipes/?tags={tag_slugs[0]}&tags={tag_slugs[-1]}")
+        ),
+        Scenario(
+            "recipes_filter_favorited",
+            get("/api/recipes/?is_favorited=1")
+        ),
+        Scenario(
+            "recipes_filter_shopping_cart",
+            get("/api/recipes/?is_in_shopping_cart=1")
+        ),
+        Scenario(
+            "recipes_filter_author",
+            get(f"/api/recipes/?author={user.pk}")
+        ),
+        Scenario("recipes_search", get("/api/recipes/?search=рецепт")),
+        Scenario("recipe_detail", get(f"/api/recipes/{recipe.pk}/")),
+        Scenario(
+            "subscriptions",
+            get("/api/users/subscriptions/?recipes_limit=3")
+        ),
+        Scenario(
+            "download_shopping_cart",
+            get("/api/recipes/download_shopping_cart/")
+        ),
+        Scenario(
+            "recipe_create",
+            lambda client: client.post(
+                "/api/recipes/",
+                json.dumps(recipe_data),
+                content_type="application/json"
+            ),
+            write=True,
+            cleanup=delete_uploaded_image
+        ),
+        Scenario(
+            "recipe_update",
+            lambda client: client.patch(
+                f"/api/recipes/{recipe.pk}/",
+                json.dumps(update_data),
+                content_type="application/json"
+            ),
+            write=True
+        ),
+    ]
+
+
+def get_client(user: User) -> Client:
+    token, _ = Token.objects.get_or_create(user=user)
+    return Client(
+        HTTP_HOST=HOST,
+        HTTP_AUTHORIZATION=f"Token {token.key}"
+    )
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    threshold: float
+) -> list[tuple[str, str]]:
+    """
+    Регрессии относительно прошлого прогона.
+
+    Регрессией считается рост медианы больше чем на threshold
+    или рост числа запросов к БД.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous: Optional[dict] = baseline.get(name)
+        if previous is None:
+            continue
+
+        if result["queries"] > previous["queries"]:
+            regressions.append(
+                (
+                    name,
+                    f"запросов {previous['queries']} -> {result['queries']}"
+                )
+            )
+        if result["median_ms"] > previous["median_ms"] * (1 + threshold):
+            regressions.append(
+                (
+                    name,
+                    f"медиана {previous['median_ms']} ->"
+                    f" {result['median_ms']} мс"
+                )
+            )
+    return regressions
+
+
+class SerializerCase:
+    """
+    Одни и те же данные, отрендеренные сериализатором DRF
+    и быстрым путем из api.representations.
+
+    Быстрый путь может получать свои объекты, например строки
+    .values() справочника вместо моделей.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        objects: list,
+        render: Callable[[list, dict], object],
+        render_fast: Callable[[list, dict], object],
+        user: User,
+        fast_objects: Optional[list] = None
+    ):
+        self.name = name
+        self.objects = objects
+        self.render = render
+        self.render_fast = render_fast
+        self.user = user
+        self.fast_objects = objects if fast_objects is None else fast_objects
+
+    def get_context(self) -> dict:
+        request = Request(APIRequestFactory().get("/api/", HTTP_HOST=HOST))
+        request.user = self.user
+        return {"request": request}
+
+    def get_content(self, fast: bool) -> bytes:
+        if fast:
+            return FastJSONRenderer().render(
+                self.render_fast(self.fast_objects, self.get_context())
+            )
+        return JSONRenderer().render(
+            self.render(self.objects, self.get_context())
+        )
+
+    def get_cpu_ms(self, fast: bool, repeat: int) -> float:
+        """Процессорное время рендера в мс на 100 объектов."""
+        started = time.process_time()
+        for _ in range(repeat):
+            self.get_content(fast)
+        elapsed = time.process_time() - started
+        return elapsed * 1000 / repeat / max(len(self.objects), 1) * 100
+
+
+def get_serializer_cases(user: User, count: int) -> list[SerializerCase]:
+    """
+    Случаи сравнения сериализаторов: страница рецептов, рецепт,
+    подписки пользователя и справочники. Данные загружаются
+    заранее, поэтому замер не включает запросы к БД.
+    """
+    recipes = list(
+        Recipe.objects.defer("search_vector").select_related(
+            "author"
+        ).prefetch_related(
+            *serializers.get_recipe_prefetches()
+        ).order_by("-pub_date")[:count]
+    )
+    authors = list(serializers.get_subscriptions_queryset(user, 3))
+    if not recipes or not authors:
+        raise BenchmarkError(
+            "Нет данных, сначала запустите seed_benchmark_data."
+        )
+
+    def many(serializer_class):
+        return lambda objects, context: serializer_class(
+            objects, many=True, context=context
+        ).data
+
+    def one(serializer_class):
+        return lambda objects, context: serializer_class(
+            objects[0], context=context
+        ).data
+
+    def rows(objects, context):
+        return objects
+
+    return [
+        SerializerCase(
+            "recipes_list",
+            recipes,
+            many(serializers.RecipeSerializer),
+            many(representations.FastRecipeSerializer),
+            user
+        ),
+        SerializerCase(
+            "recipe_detail",
+            recipes[:1],
+            one(serializers.RecipeSerializer),
+            one(representations.FastRecipeSerializer),
+            user
+        ),
+        SerializerCase(
+            "subscriptions",
+            authors,
+            many(serializers.UserRecipeGETSerializer),
+            many(representations.FastSubscriptionSerializer),
+            user
+        ),
+        SerializerCase(
+            "tags",
+            list(Tag.objects.all()),
+            many(serializers.TagSerializer),
+            rows,
+            user,
+            list(Tag.objects.values(*representations.TAG_FIELDS))
+        ),
+        SerializerCase(
+            "ingredients",
+            list(Ingredient.objects.all()),
+            many(serializers.IngredientSerializer),
+            rows,
+            user,
+            list(
+                Ingredient.objects.values(*representations.INGREDIENT_FIELDS)
+            )
+        ),
+    ]
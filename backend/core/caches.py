@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+
+# Бэкенды, кеш которых виден только своему процессу.
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_shared_cache(alias: str = DEFAULT_CACHE_ALIAS) -> bool:
+    """
+    Кеш общий для всех воркеров сервера (memcached, БД).
+
+    Сброс в локальном кеше процесса не виден другим воркерам,
+    они отдают устаревшие данные до истечения таймаута.
+    """
+    return settings.CACHES[alias]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
@@ -0,0 +1,30 @@
+from django.db.models import F, Model
+from django.db.models.functions import Greatest
+
+
+def change_counter(model: type[Model], pk: int, field: str, delta: int):
+    """Атомарно меняет счетчик одним UPDATE, не опуская его ниже нуля."""
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def reconcile_counter(
+    queryset,
+    field: str,
+    actual_counts: dict[int, int]
+) -> int:
+    """
+    Сверяет счетчик у записей queryset с фактическими значениями.
+
+    Возвращает число исправленных записей.
+    """
+    changed = []
+    for obj in queryset.only("pk", field):
+        actual = actual_counts.get(obj.pk, 0)
+        if getattr(obj, field) != actual:
+            setattr(obj, field, actual)
+            changed.append(obj)
+
+    queryset.model.objects.bulk_update(changed, [field])
+    return len(changed)
@@ -0,0 +1,72 @@
+from django.db.backends.postgresql import base
+
+from core.db.pool import get_pool
+
+
+def is_alive(connection) -> bool:
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connection.rollback()
+    except base.Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL с проверкой постоянных соединений и пулом.
+
+    CONN_HEALTH_CHECKS: перед первым запросом к БД в каждом
+    HTTP-запросе соединение проверяется через SELECT 1 и при
+    обрыве открывается заново, а не падает с ошибкой.
+
+    POOL: {"MAX_SIZE": ..., "TIMEOUT": ...} включает пул
+    соединений процесса, close() возвращает соединение в пул.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            "CONN_HEALTH_CHECKS", False
+        )
+        self.health_check_done = False
+        self.pool = get_pool(self.alias, self.settings_dict.get("POOL") or {})
+
+    def get_new_connection(self, conn_params):
+        self.health_check_done = True
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+
+        connect = super().get_new_connection
+        return self.pool.acquire(
+            lambda: connect(conn_params),
+            check=is_alive if self.health_check_enabled else None
+        )
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            self.pool.release(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (
+            self.connection is None
+            or not self.health_check_enabled
+            or self.health_check_done
+        ):
+            return
+
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import OperationalError
+
+DEFAULT_TIMEOUT = 10
+
+_pools: dict[str, "ConnectionPool"] = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Пул соединений с PostgreSQL внутри процесса.
+
+    Нужен в режимах с потоками (ASGI, gthread), где каждый поток
+    держит свое соединение: вместо открытия нового соединения
+    на запрос поток берет свободное из пула и возвращает его
+    после запроса. Если заняты все max_size соединений, поток
+    ждет освобождения не дольше timeout секунд.
+    """
+
+    def __init__(self, alias: str, max_size: int, timeout: float):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle = deque()
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        self.in_use = 0
+        self.stats = {
+            "created": 0,
+            "reused": 0,
+            "discarded": 0,
+            "connect_errors": 0,
+            "timeouts": 0,
+            "wait_time": 0.0,
+        }
+
+    def acquire(self, connect: Callable, check: Optional[Callable] = None):
+        """
+        Берет свободное соединение или открывает новое.
+
+        check проверяет соединение из пула перед выдачей,
+        не прошедшие проверку закрываются.
+        """
+        started = time.perf_counter()
+        if not self.slots.acquire(timeout=self.timeout):
+            with self.lock:
+                self.stats["timeouts"] += 1
+            raise PoolTimeout(
+                f"No free connection in pool '{self.alias}'"
+                f" after {self.timeout} seconds."
+            )
+
+        with self.lock:
+            self.stats["wait_time"] += time.perf_counter() - started
+            self.in_use += 1
+
+        while True:
+            with self.lock:
+                connection = self.idle.pop() if self.idle else None
+            if connection is None:
+                break
+            if not connection.closed and (check is None or check(connection)):
+                with self.lock:
+                    self.stats["reused"] += 1
+                return connection
+            connection.close()
+            with self.lock:
+                self.stats["discarded"] += 1
+
+        try:
+            connection = connect()
+        except Exception:
+            self.discard_slot("connect_errors")
+            raise
+
+        with self.lock:
+            self.stats["created"] += 1
+        return connection
+
+    def release(self, connection, discard: bool = False) -> None:
+        if not discard and not connection.closed:
+            try:
+                # Соединение возвращается в пул без открытой транзакции.
+                connection.rollback()
+            except Exception:
+                discard = True
+            else:
+                with self.lock:
+                    self.in_use -= 1
+                    self.idle.append(connection)
+                self.slots.release()
+                return
+
+        try:
+            connection.close()
+        finally:
+            self.discard_slot()
+
+    def discard_slot(self, counter: str = "discarded") -> None:
+        with self.lock:
+            self.in_use -= 1
+            self.stats[counter] += 1
+        self.slots.release()
+
+    def close_idle(self) -> None:
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+        for connection in idle:
+            connection.close()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "max_size": self.max_size,
+                "in_use": self.in_use,
+                "idle": len(self.idle),
+                **self.stats,
+            }
+
+
+def get_pool(alias: str, options: dict) -> Optional[ConnectionPool]:
+    """Пул для алиаса БД или None, если POOL.MAX_SIZE не задан."""
+    max_size = options.get("MAX_SIZE")
+    if not max_size:
+        return None
+
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(
+                alias,
+                max_size,
+                options.get("TIMEOUT", DEFAULT_TIMEOUT)
+            )
+        return _pools[alias]
+
+
+def get_pool_stats() -> dict[str, dict]:
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.get_stats() for alias, pool in pools.items()}
+
+
+def get_database_stats() -> dict[str, dict]:
+    """Настройки соединений и статистика пула по каждой БД процесса."""
+    pool_stats = get_pool_stats()
+    return {
+        alias: {
+            "engine": database["ENGINE"],
+            "conn_max_age": database.get("CONN_MAX_AGE", 0),
+            "health_checks": database.get("CONN_HEALTH_CHECKS", False),
+            "pool": pool_stats.get(alias),
+        }
+        for alias, database in settings.DATABASES.items()
+    }
@@ -0,0 +1,69 @@
+import logging
+
+from django.core.management import BaseCommand, CommandError
+
+from core.benchmarks import BenchmarkError, get_serializer_cases
+from core.management.commands.seed_benchmark_data import USERNAME_PREFIX
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выводит процессорное время рендера на 100 объектов быстрыми"
+        " сериализаторами и сериализаторами DRF на данных бенчмарка."
+        " Побайтное совпадение ответов проверяют тесты"
+        " api.tests.test_fast_serializers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--no-benchmark",
+            action="store_true",
+            help="Только проверка совпадения"
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(
+            username=f"{USERNAME_PREFIX}0"
+        ).first()
+        if user is None:
+            raise CommandError(
+                "Нет данных, сначала запустите seed_benchmark_data."
+            )
+
+        try:
+            cases = get_serializer_cases(user, options["recipes"])
+        except BenchmarkError as error:
+            raise CommandError(str(error))
+
+        mismatches = []
+        for case in cases:
+            content = case.get_content(fast=False)
+            fast_content = case.get_content(fast=True)
+            if content != fast_content:
+                mismatches.append(case.name)
+                self.stdout.write(f"{case.name:16} ответы различаются")
+                continue
+
+            if options["no_benchmark"]:
+                self.stdout.write(f"{case.name:16} совпадает")
+                continue
+
+            cpu_ms = case.get_cpu_ms(False, options["repeat"])
+            fast_cpu_ms = case.get_cpu_ms(True, options["repeat"])
+            self.stdout.write(
+                f"{case.name:16} совпадает, объектов {len(case.objects):5}"
+                f"  DRF {cpu_ms:8.2f} мс"
+                f"  быстрый {fast_cpu_ms:8.2f} мс на 100"
+                f"  x{cpu_ms / max(fast_cpu_ms, 1e-6):.1f}"
+            )
+
+        if mismatches:
+            logger.error(f"Fast serializers mismatch: {mismatches}")
+            raise CommandError(
+                f"Быстрые сериализаторы расходятся: {', '.join(mismatches)}"
+            )
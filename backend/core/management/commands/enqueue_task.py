@@ -0,0 +1,29 @@
+import json
+
+from django.core.management import BaseCommand, CommandError
+
+from core.tasks import TaskError, enqueue
+
+
+class Command(BaseCommand):
+    help = (
+        "Ставит фоновую задачу в очередь, например"
+        " reconcile_counters или update_popularity по расписанию."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("name")
+        parser.add_argument(
+            "--payload",
+            default="{}",
+            help="Параметры задачи в JSON"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            payload = json.loads(options["payload"])
+            task = enqueue(options["name"], payload)
+        except (ValueError, TypeError, TaskError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f"Задача {task.name} #{task.pk} в очереди.")
@@ -0,0 +1,95 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urljoin
+from urllib.request import Request, urlopen
+
+from django.core.management import BaseCommand
+
+from core.profiling import percentile
+
+DEFAULT_PATHS = [
+    "/api/tags/",
+    "/api/ingredients/?name=мо",
+    "/api/recipes/",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест запущенного сервера: параллельные GET-запросы"
+        " к эндпоинтам чтения. Несколько --base-url сравниваются"
+        " между собой, например режимы wsgi и asgi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            action="append",
+            help="Адрес сервера, можно указать несколько раз"
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            help="Путь эндпоинта, можно указать несколько раз"
+        )
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--token", help="Токен для авторизации")
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        base_urls = options["base_url"] or ["http://127.0.0.1:8000"]
+        paths = options["path"] or DEFAULT_PATHS
+        headers = {"Accept": "application/json"}
+        if options["token"]:
+            headers["Authorization"] = f"Token {options['token']}"
+
+        for base_url in base_urls:
+            for path in paths:
+                url = urljoin(base_url, quote(path, safe="/?=&"))
+                result = self.run(url, headers, options)
+                self.stdout.write(self.format_result(base_url, path, result))
+
+    def fetch(self, url: str, headers: dict, timeout: float):
+        started = time.perf_counter()
+        try:
+            with urlopen(Request(url, headers=headers), timeout=timeout) as r:
+                r.read()
+                ok = r.status < 400
+        except (HTTPError, URLError, OSError):
+            ok = False
+        return time.perf_counter() - started, ok
+
+    def run(self, url: str, headers: dict, options: dict) -> dict:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(
+                pool.map(
+                    lambda _: self.fetch(url, headers, options["timeout"]),
+                    range(options["requests"])
+                )
+            )
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency * 1000 for latency, ok in results if ok]
+        return {
+            "requests": len(results),
+            "errors": len(results) - len(latencies),
+            "rps": len(results) / elapsed,
+            "latencies": latencies,
+        }
+
+    def format_result(self, base_url: str, path: str, result: dict) -> str:
+        latencies = result["latencies"]
+        if not latencies:
+            return f"{base_url}{path}: все {result['requests']} с ошибкой"
+
+        return (
+            f"{base_url}{path}: {result['rps']:.1f} rps,"
+            f" ошибок {result['errors']}/{result['requests']},"
+            f" p50 {statistics.median(latencies):.1f} мс,"
+            f" p95 {percentile(latencies, 95):.1f} мс,"
+            f" p99 {percentile(latencies, 99):.1f} мс"
+        )
@@ -0,0 +1,75 @@
+import logging
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from core.counters import reconcile_counter
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribe, User
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+COUNTERS = [
+    (Recipe, "favorites_count", Favorite, "recipe_id"),
+    (Recipe, "in_carts_count", ShoppingCart, "recipe_id"),
+    (User, "recipes_count", Recipe, "author_id"),
+    (User, "subscribers_count", Subscribe, "author_id"),
+]
+
+
+def count_by(model, field: str, pks: list[int]) -> dict[int, int]:
+    return dict(
+        model.objects.filter(
+            **{f"{field}__in": pks}
+        ).order_by().values_list(field).annotate(total=Count("pk"))
+    )
+
+
+def reconcile(model, field, related_model, related_field, batch_size):
+    fixed = 0
+    last_pk = 0
+    while True:
+        pks = list(
+            model.objects.filter(pk__gt=last_pk).order_by(
+                "pk"
+            ).values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            return fixed
+
+        with transaction.atomic():
+            fixed += reconcile_counter(
+                model.objects.filter(pk__in=pks).select_for_update(),
+                field,
+                count_by(related_model, related_field, pks)
+            )
+        last_pk = pks[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет денормализованные счетчики избранного, корзин,"
+        " рецептов и подписчиков с фактическими данными."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        for model, field, related_model, related_field in COUNTERS:
+            fixed = reconcile(
+                model,
+                field,
+                related_model,
+                related_field,
+                options["batch_size"]
+            )
+            logger.info(f"{model.__name__}.{field}: fixed {fixed} rows.")
+            self.stdout.write(f"{model.__name__}.{field}: исправлено {fixed}")
@@ -0,0 +1,99 @@
+import json
+import logging
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+from core.benchmarks import BenchmarkError, compare, get_client, get_scenarios
+from core.management.commands.seed_benchmark_data import USERNAME_PREFIX
+from recipes.models import Recipe
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарки горячих путей API: медиана и p95 времени ответа"
+        " и число запросов к БД. С --compare сравнивает результат"
+        " с прошлым прогоном и падает при регрессии."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            help="Запустить только указанные сценарии"
+        )
+        parser.add_argument("--output", help="Сохранить результат в JSON")
+        parser.add_argument("--compare", help="JSON прошлого прогона")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Допустимый рост медианы, доля"
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(
+            username=f"{USERNAME_PREFIX}0"
+        ).first()
+        if user is None:
+            raise CommandError(
+                "Нет данных, сначала запустите seed_benchmark_data."
+            )
+
+        try:
+            scenarios = get_scenarios(user)
+            client = get_client(user)
+            results = {}
+            for scenario in scenarios:
+                if (
+                    options["scenario"]
+                    and scenario.name not in options["scenario"]
+                ):
+                    continue
+                results[scenario.name] = scenario.run(
+                    client, options["repeat"], options["warmup"]
+                )
+                self.stdout.write(
+                    f"{scenario.name:32}"
+                    f" медиана {results[scenario.name]['median_ms']:8.2f} мс"
+                    f"  p95 {results[scenario.name]['p95_ms']:8.2f} мс"
+                    f"  запросов {results[scenario.name]['queries']}"
+                )
+        except BenchmarkError as error:
+            raise CommandError(str(error))
+
+        report = {
+            "meta": {
+                "database": connection.vendor,
+                "recipes": Recipe.objects.count(),
+                "users": User.objects.count(),
+                "repeat": options["repeat"],
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)
+            if baseline["meta"] != {
+                **report["meta"], "repeat": baseline["meta"]["repeat"]
+            }:
+                self.stdout.write(
+                    "Прогоны на разных данных, сравнение неточное."
+                )
+            regressions = compare(
+                results, baseline["results"], options["threshold"]
+            )
+            for name, message in regressions:
+                self.stdout.write(f"Регрессия {name}: {message}")
+            if regressions:
+                raise CommandError(f"Регрессий: {len(regressions)}")
+            self.stdout.write("Регрессий нет.")
@@ -0,0 +1,76 @@
+import logging
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import close_old_connections
+
+from core.tasks import (claim_task, get_worker_id, purge_finished_tasks,
+                        requeue_stale_tasks, run_task)
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = getattr(settings, "TASK_POLL_INTERVAL", 1)
+
+MAINTENANCE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Обработчик фоновых задач из БД: выгрузки списка покупок,"
+        " копии картинок, пересчет счетчиков. Можно запускать"
+        " несколько процессов, задача достается одному из них."
+        " SIGTERM завершает обработчик после текущей задачи."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить готовые задачи и выйти"
+        )
+        parser.add_argument("--max-tasks", type=int, default=0)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=POLL_INTERVAL
+        )
+        parser.add_argument("--worker-id")
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        worker_id = options["worker_id"] or get_worker_id()
+        logger.info(f"Worker {worker_id} started.")
+        processed = 0
+        maintained = 0.0
+        while not self.stopping.is_set():
+            close_old_connections()
+            if time.monotonic() - maintained > MAINTENANCE_INTERVAL:
+                requeue_stale_tasks()
+                purge_finished_tasks()
+                maintained = time.monotonic()
+
+            task = claim_task(worker_id)
+            if task is None:
+                if options["once"]:
+                    break
+                self.stopping.wait(options["poll_interval"])
+                continue
+
+            task = run_task(task)
+            processed += 1
+            self.stdout.write(f"{task.name} #{task.pk}: {task.status}")
+            if options["max_tasks"] and processed >= options["max_tasks"]:
+                break
+
+        close_old_connections()
+        logger.info(f"Worker {worker_id} stopped, tasks: {processed}.")
+        self.stdout.write(f"Выполнено задач: {processed}")
+
+    def stop(self, signum, frame):
+        self.stopping.set()
@@ -0,0 +1,197 @@
+import io
+import logging
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand, call_command
+from django.db import transaction
+from PIL import Image
+
+from api.caching import invalidate_response_tags, tags_catalog
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            RecipeTag, ShoppingCart, Tag)
+from recipes.user_state import invalidate_user_state
+from recipes.utils import invalidate_tag_ids
+from users.models import Subscribe, User
+
+logger = logging.getLogger(__name__)
+
+USERNAME_PREFIX = "bench_"
+
+TAG_SLUG_PREFIX = "bench-"
+
+PASSWORD = "bench-password"
+
+IMAGE_NAME = "recipes/images/benchmark.png"
+
+BATCH_SIZE = 1000
+
+
+def get_image_name() -> str:
+    if not default_storage.exists(IMAGE_NAME):
+        buffer = io.BytesIO()
+        Image.new("RGB", (600, 400), "orange").save(buffer, "PNG")
+        default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+    return IMAGE_NAME
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет БД данными для бенчмарков: пользователи, теги,"
+        " рецепты с ингредиентами, избранное, корзины и подписки."
+        " Данные воспроизводимы при одинаковых --seed и размерах."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--recipes", type=int, default=2000)
+        parser.add_argument("--tags", type=int, default=10)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+        parser.add_argument("--tags-per-recipe", type=int, default=2)
+        parser.add_argument("--favorites-per-user", type=int, default=30)
+        parser.add_argument("--carts-per-user", type=int, default=10)
+        parser.add_argument("--subscriptions-per-user", type=int, default=15)
+        parser.add_argument("--seed", type=int, default=42)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        Tag.objects.filter(slug__startswith=TAG_SLUG_PREFIX).delete()
+
+        if not Ingredient.objects.exists():
+            call_command("load_ingredients_in_db", stdout=io.StringIO())
+        ingredient_ids = list(
+            Ingredient.objects.order_by("pk").values_list("pk", flat=True)
+        )
+
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f"{USERNAME_PREFIX}{number}",
+                    email=f"{USERNAME_PREFIX}{number}@example.com",
+                    first_name="Bench",
+                    last_name=str(number),
+                    password=password
+                )
+                for number in range(options["users"])
+            ),
+            batch_size=BATCH_SIZE
+        )
+        user_ids = list(
+            User.objects.filter(
+                username__startswith=USERNAME_PREFIX
+            ).order_by("pk").values_list("pk", flat=True)
+        )
+
+        Tag.objects.bulk_create(
+            Tag(
+                name=f"Бенчмарк {number}",
+                color=f"#{rng.randrange(0x1000000):06X}",
+                slug=f"{TAG_SLUG_PREFIX}{number}"
+            )
+            for number in range(options["tags"])
+        )
+        tag_ids = list(
+            Tag.objects.filter(
+                slug__startswith=TAG_SLUG_PREFIX
+            ).order_by("pk").values_list("pk", flat=True)
+        )
+
+        image = get_image_name()
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    name=f"Рецепт {number}",
+                    text=f"Описание рецепта {number}. " * 10,
+                    author_id=rng.choice(user_ids),
+                    image=image,
+                    cooking_time=rng.randint(1, 180)
+                )
+                for number in range(options["recipes"])
+            ),
+            batch_size=BATCH_SIZE
+        )
+        recipe_ids = list(
+            Recipe.objects.filter(
+                author_id__in=user_ids
+            ).order_by("pk").values_list("pk", flat=True)
+        )
+
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rng.randint(1, 500)
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in rng.sample(
+                    ingredient_ids,
+                    min(options["ingredients_per_recipe"], len(ingredient_ids))
+                )
+            ),
+            batch_size=BATCH_SIZE
+        )
+        RecipeTag.objects.bulk_create(
+            (
+                RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in rng.sample(
+                    tag_ids, min(options["tags_per_recipe"], len(tag_ids))
+                )
+            ),
+            batch_size=BATCH_SIZE
+        )
+
+        for model, per_user in (
+            (Favorite, options["favorites_per_user"]),
+            (ShoppingCart, options["carts_per_user"]),
+        ):
+            model.objects.bulk_create(
+                (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in user_ids
+                    for recipe_id in rng.sample(
+                        recipe_ids, min(per_user, len(recipe_ids))
+                    )
+                ),
+                batch_size=BATCH_SIZE
+            )
+
+        Subscribe.objects.bulk_create(
+            (
+                Subscribe(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in rng.sample(
+                    user_ids,
+                    min(options["subscriptions_per_user"], len(user_ids))
+                )
+                if author_id != user_id
+            ),
+            batch_size=BATCH_SIZE
+        )
+
+        # bulk_create не вызывает сигналы, производные данные
+        # пересчитываются командами, кеши сбрасываются явно.
+        call_command("reconcile_counters", stdout=io.StringIO())
+        call_command("update_popularity", stdout=io.StringIO())
+        call_command("update_search_vectors", stdout=io.StringIO())
+        invalidate_tag_ids()
+        tags_catalog.invalidate()
+        invalidate_response_tags("recipes")
+        for user_id in user_ids:
+            invalidate_user_state(user_id)
+
+        logger.info(
+            f"Benchmark data seeded: {len(user_ids)} users,"
+            f" {len(recipe_ids)} recipes."
+        )
+        self.stdout.write(
+            f"Пользователей: {len(user_ids)}, рецептов: {len(recipe_ids)},"
+            f" тегов: {len(tag_ids)}"
+        )
@@ -0,0 +1,84 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from core.profiling import (N_PLUS_ONE_THRESHOLD, SAMPLE_RATE, QueryRecorder,
+                            get_view_name, stats)
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    """
+    Замеры выборки запросов: число и время запросов к БД, время
+    представления без БД (в нем работают сериализаторы), время
+    рендеринга и размер ответа.
+
+    Замеры попадают в заголовок Server-Timing и в статистику
+    по представлениям. Повторяющиеся шаблоны SQL (N+1) пишутся
+    в лог. Доля замеряемых запросов - PROFILING_SAMPLE_RATE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not SAMPLE_RATE or random.random() >= SAMPLE_RATE:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        request.profiling_view_end = None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        finished = time.perf_counter()
+
+        self.record(request, response, recorder, started, finished)
+        return response
+
+    def process_template_response(self, request, response):
+        # Вызывается после представления и до рендеринга ответа DRF.
+        request.profiling_view_end = time.perf_counter()
+        return response
+
+    def record(self, request, response, recorder, started, finished):
+        view_end = getattr(request, "profiling_view_end", None) or finished
+        total_ms = (finished - started) * 1000
+        db_ms = recorder.duration * 1000
+        render_ms = (finished - view_end) * 1000
+        app_ms = max(total_ms - db_ms - render_ms, 0)
+        size = None if response.streaming else len(response.content)
+
+        response["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries",'
+            f" app;dur={app_ms:.1f}, render;dur={render_ms:.1f},"
+            f" total;dur={total_ms:.1f}"
+        )
+
+        view = get_view_name(request)
+        if view is None:
+            return
+
+        repeated = recorder.get_repeated(N_PLUS_ONE_THRESHOLD)
+        for sql, count in repeated:
+            logger.warning(
+                f"Possible N+1 in {view}: {count} x {sql[:200]}"
+            )
+
+        stats.add(
+            view,
+            {
+                "total_ms": total_ms,
+                "db_ms": db_ms,
+                "app_ms": app_ms,
+                "render_ms": render_ms,
+                "queries": recorder.count,
+                "size": size,
+            },
+            n_plus_one=bool(repeated)
+        )
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class BaseRecipeUserModel(models.Model):
@@ -14,7 +15,109 @@ class BaseRecipeUserModel(models.Model):
         related_name="%(model_name)s",
         on_delete=models.CASCADE
     )
+    created = models.DateTimeField(
+        verbose_name="Дата добавления",
+        default=timezone.now,
+        db_index=True
+    )
 
     class Meta:
         abstract = True
         default_related_name = "%(app_label)s_%(model_name)s"
+
+
+class Task(models.Model):
+    """
+    Фоновая задача очереди в БД.
+
+    Задачу берет процесс run_worker, при ошибке она повторяется
+    с растущей задержкой, пока не кончатся попытки.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Ошибка"),
+    ]
+
+    name = models.CharField(
+        max_length=100,
+        verbose_name="Задача"
+    )
+    payload = models.JSONField(
+        verbose_name="Параметры",
+        default=dict,
+        blank=True
+    )
+    status = models.CharField(
+        max_length=20,
+        verbose_name="Статус",
+        choices=STATUSES,
+        default=PENDING
+    )
+    user = models.ForeignKey(
+        "users.User",
+        verbose_name="Пользователь",
+        related_name="tasks",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name="Попыток",
+        default=0
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name="Максимум попыток",
+        default=3
+    )
+    run_after = models.DateTimeField(
+        verbose_name="Не раньше",
+        default=timezone.now
+    )
+    result = models.JSONField(
+        verbose_name="Результат",
+        null=True,
+        blank=True
+    )
+    error = models.TextField(
+        verbose_name="Последняя ошибка",
+        blank=True
+    )
+    worker = models.CharField(
+        max_length=100,
+        verbose_name="Обработчик",
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name="Создана",
+        default=timezone.now
+    )
+    started = models.DateTimeField(
+        verbose_name="Начата",
+        null=True,
+        blank=True
+    )
+    finished = models.DateTimeField(
+        verbose_name="Завершена",
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        ordering = ["-created"]
+        indexes = [
+            models.Index(
+                fields=["status", "run_after"],
+                name="task_status_run_after_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,106 @@
+import math
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Optional
+
+from django.conf import settings
+
+SAMPLE_RATE = getattr(settings, "PROFILING_SAMPLE_RATE", 0.1)
+
+N_PLUS_ONE_THRESHOLD = getattr(settings, "PROFILING_N_PLUS_ONE_THRESHOLD", 5)
+
+WINDOW_SIZE = getattr(settings, "PROFILING_WINDOW_SIZE", 1000)
+
+METRICS = ("total_ms", "db_ms", "app_ms", "render_ms", "queries", "size")
+
+PERCENTILES = (50, 95, 99)
+
+
+class QueryRecorder:
+    """Обертка execute_wrapper: число запросов, время и шаблоны SQL."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.templates = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            # Параметры передаются отдельно, sql уже шаблон.
+            self.templates[sql] += 1
+
+    def get_repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [
+            (sql, count)
+            for sql, count in self.templates.most_common()
+            if count >= threshold
+        ]
+
+
+def percentile(values: list, percent: int):
+    """Перцентиль методом ближайшего ранга."""
+    values = sorted(values)
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+class ProfileStats:
+    """
+    Последние WINDOW_SIZE замеров по каждому представлению.
+
+    Статистика живет в памяти процесса, у каждого воркера своя.
+    """
+
+    def __init__(self, window_size: int = WINDOW_SIZE):
+        self.window_size = window_size
+        self.samples = defaultdict(lambda: deque(maxlen=self.window_size))
+        self.n_plus_one = Counter()
+        self.lock = threading.Lock()
+
+    def add(self, view: str, sample: dict, n_plus_one: bool) -> None:
+        with self.lock:
+            self.samples[view].append(sample)
+            if n_plus_one:
+                self.n_plus_one[view] += 1
+
+    def get_summary(self) -> dict[str, dict]:
+        with self.lock:
+            samples = {view: list(rows) for view, rows in self.samples.items()}
+            n_plus_one = dict(self.n_plus_one)
+
+        summary = {}
+        for view, rows in sorted(samples.items()):
+            summary[view] = {
+                "samples": len(rows),
+                "n_plus_one": n_plus_one.get(view, 0),
+            }
+            for metric in METRICS:
+                values = [
+                    row[metric] for row in rows if row[metric] is not None
+                ]
+                if values:
+                    summary[view][metric] = {
+                        f"p{percent}": round(percentile(values, percent), 2)
+                        for percent in PERCENTILES
+                    }
+        return summary
+
+    def reset(self) -> None:
+        with self.lock:
+            self.samples.clear()
+            self.n_plus_one.clear()
+
+
+stats = ProfileStats()
+
+
+def get_view_name(request) -> Optional[str]:
+    match = request.resolver_match
+    if match is None:
+        return None
+    return f"{request.method} {match.view_name or match._func_path}"
@@ -0,0 +1,214 @@
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Task
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, "TASK_MAX_ATTEMPTS", 3)
+
+RETRY_DELAY = getattr(settings, "TASK_RETRY_DELAY", 10)
+
+# Задача в статусе running дольше этого времени считается брошенной.
+TASK_TIMEOUT = getattr(settings, "TASK_TIMEOUT", 600)
+
+RESULT_TTL = getattr(settings, "TASK_RESULT_TTL", 24 * 60 * 60)
+
+_handlers: dict[str, Callable] = {}
+
+_cleanups: dict[str, Callable] = {}
+
+
+class TaskError(Exception):
+    pass
+
+
+def register_task(name: str, cleanup: Optional[Callable] = None):
+    """
+    Регистрирует обработчик задачи name.
+
+    Обработчик получает параметры задачи и возвращает результат,
+    который сохраняется в JSON. cleanup(result) удаляет то, что
+    задача оставила после себя, например файл выгрузки.
+    """
+    def decorator(handler: Callable) -> Callable:
+        _handlers[name] = handler
+        if cleanup is not None:
+            _cleanups[name] = cleanup
+        return handler
+
+    return decorator
+
+
+def enqueue(
+    name: str,
+    payload: Optional[dict] = None,
+    user=None,
+    max_attempts: int = MAX_ATTEMPTS
+) -> Task:
+    if name not in _handlers:
+        raise TaskError(f"Unknown task: {name}")
+
+    return Task.objects.create(
+        name=name,
+        payload=payload or {},
+        user=user,
+        max_attempts=max_attempts
+    )
+
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_task(worker_id: str) -> Optional[Task]:
+    """
+    Забирает следующую готовую задачу.
+
+    SELECT ... FOR UPDATE SKIP LOCKED не дает двум обработчикам
+    выбрать одну строку. Условный UPDATE по статусу защищает
+    на БД без блокировок строк (SQLite).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        task = Task.objects.select_for_update(skip_locked=True).filter(
+            status=Task.PENDING,
+            run_after__lte=now
+        ).order_by("run_after", "pk").first()
+        if task is None:
+            return None
+
+        claimed = Task.objects.filter(
+            pk=task.pk, status=Task.PENDING
+        ).update(
+            status=Task.RUNNING,
+            attempts=task.attempts + 1,
+            started=now,
+            worker=worker_id
+        )
+    if not claimed:
+        return None
+
+    task.refresh_from_db()
+    return task
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=RETRY_DELAY * 2 ** max(attempts - 1, 0))
+
+
+def finish_task(task: Task, **fields) -> bool:
+    """
+    Сохраняет итог выполнения, если задача все еще за этим запуском.
+
+    Задачу дольше TASK_TIMEOUT requeue_stale_tasks возвращает
+    в очередь, и ее может забрать другой обработчик. Итог старого
+    запуска тогда не должен затереть состояние нового.
+    """
+    return bool(Task.objects.filter(
+        pk=task.pk,
+        status=Task.RUNNING,
+        worker=task.worker,
+        started=task.started
+    ).update(**fields))
+
+
+def run_task(task: Task) -> Task:
+    """Выполняет задачу и сохраняет результат или планирует повтор."""
+    handler = _handlers.get(task.name)
+    try:
+        if handler is None:
+            raise TaskError(f"Unknown task: {task.name}")
+        result = handler(**task.payload)
+    except Exception:
+        task.error = traceback.format_exc()
+        task.finished = timezone.now()
+        if task.attempts < task.max_attempts:
+            task.status = Task.PENDING
+            task.run_after = task.finished + get_retry_delay(task.attempts)
+            logger.warning(
+                f"Task {task.pk} {task.name} failed,"
+                f" attempt {task.attempts}/{task.max_attempts}."
+            )
+        else:
+            task.status = Task.FAILED
+            logger.exception(f"Task {task.pk} {task.name} failed.")
+        if not finish_task(
+            task,
+            status=task.status,
+            error=task.error,
+            finished=task.finished,
+            run_after=task.run_after
+        ):
+            logger.warning(f"Task {task.pk} {task.name} was requeued.")
+            task.refresh_from_db()
+        return task
+
+    task.status = Task.DONE
+    task.result = result
+    task.finished = timezone.now()
+    if not finish_task(
+        task,
+        status=task.status,
+        result=task.result,
+        finished=task.finished
+    ):
+        logger.warning(
+            f"Task {task.pk} {task.name} was requeued,"
+            " result discarded."
+        )
+        cleanup = _cleanups.get(task.name)
+        if cleanup is not None:
+            cleanup(result)
+        task.refresh_from_db()
+        return task
+
+    logger.info(f"Task {task.pk} {task.name} done.")
+    return task
+
+
+def requeue_stale_tasks() -> int:
+    """
+    Возвращает в очередь задачи упавших обработчиков.
+
+    Задачи без оставшихся попыток помечаются ошибкой.
+    """
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        started__lt=timezone.now() - timedelta(seconds=TASK_TIMEOUT)
+    )
+    failed = stale.filter(
+        attempts__gte=F("max_attempts")
+    ).update(
+        status=Task.FAILED,
+        error="Превышено время выполнения.",
+        finished=timezone.now()
+    )
+    requeued = stale.update(status=Task.PENDING, run_after=timezone.now())
+    return failed + requeued
+
+
+def purge_finished_tasks() -> int:
+    """Удаляет завершенные задачи старше RESULT_TTL вместе с файлами."""
+    expired = Task.objects.filter(
+        status__in=[Task.DONE, Task.FAILED],
+        finished__lt=timezone.now() - timedelta(seconds=RESULT_TTL)
+    )
+    for name, result in expired.filter(
+        status=Task.DONE, name__in=list(_cleanups)
+    ).values_list("name", "result").iterator():
+        try:
+            _cleanups[name](result)
+        except Exception:
+            logger.exception(f"Cleanup of {name} result failed.")
+    deleted, _ = expired.delete()
+    return deleted
@@ -2,6 +2,7 @@ from django.contrib import admin
 
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient, RecipeTag,
                      ShoppingCart, Tag)
+from .search import update_search_vectors
 
 
 @admin.register(Favorite)
@@ -31,17 +32,17 @@ class RecipeTagInline(admin.TabularInline):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = [
-        "id", "name", "author", "cooking_time", "favorite_count"
+        "id", "name", "author", "cooking_time",
+        "favorites_count", "in_carts_count"
     ]
     list_filter = ["name", "author", "tags"]
     search_fields = ["name", "author__username", "cooking_time"]
     filter_horizontal = ["tags"]
     inlines = [RecipeIngredientInline, RecipeTagInline]
 
-    def favorite_count(self, obj):
-        return obj.favorite.count()
-
-    favorite_count.short_description = "Количество избранных"
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        update_search_vectors([form.instance.pk])
 
 
 @admin.register(Tag)
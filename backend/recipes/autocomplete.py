@@ -0,0 +1,165 @@
+import threading
+import uuid
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import Lower
+
+from core.caches import is_shared_cache
+from recipes.models import Ingredient
+
+VERSION_CACHE_KEY = "recipes:ingredient_autocomplete:version"
+
+AUTOCOMPLETE_LIMIT = getattr(settings, "INGREDIENT_AUTOCOMPLETE_LIMIT", 20)
+
+# Дерево пересобирается по версии каталога в кеше. Локальный кеш
+# процесса не видит новую версию из других воркеров и загрузчика
+# ингредиентов, поэтому без общего кеша поиск идет по БД.
+USE_TRIE = getattr(
+    settings, "INGREDIENT_AUTOCOMPLETE_TRIE", True
+) and is_shared_cache()
+
+
+class TrieNode:
+    __slots__ = ("children", "ingredient_ids")
+
+    def __init__(self):
+        self.children: dict[str, TrieNode] = {}
+        self.ingredient_ids: list[int] = []
+
+
+class IngredientTrie:
+    """
+    Префиксное дерево по названиям ингредиентов в нижнем регистре.
+
+    Таблица ингредиентов почти не меняется, поэтому дерево
+    строится в памяти процесса один раз и пересобирается
+    только после изменения версии каталога.
+    """
+
+    def __init__(self, rows: list[tuple[int, str]], version: str):
+        self.version = version
+        self.root = TrieNode()
+        self.names: list[tuple[int, str]] = []
+
+        for ingredient_id, name in rows:
+            name = name.lower()
+            self.names.append((ingredient_id, name))
+            node = self.root
+            for char in name:
+                node = node.children.setdefault(char, TrieNode())
+            node.ingredient_ids.append(ingredient_id)
+
+    def starts_with(self, prefix: str, limit: int) -> list[int]:
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        result = []
+        stack = [node]
+        while stack and len(result) < limit:
+            node = stack.pop()
+            result.extend(node.ingredient_ids)
+            stack.extend(
+                node.children[char]
+                for char in sorted(node.children, reverse=True)
+            )
+        return result[:limit]
+
+    def contains(self, value: str, limit: int, exclude: set) -> list[int]:
+        result = []
+        for ingredient_id, name in self.names:
+            if value in name and ingredient_id not in exclude:
+                result.append(ingredient_id)
+                if len(result) >= limit:
+                    break
+        return result
+
+
+_trie: Optional[IngredientTrie] = None
+_trie_lock = threading.Lock()
+
+
+def get_catalog_version() -> str:
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_CACHE_KEY, version, timeout=None):
+            version = cache.get(VERSION_CACHE_KEY, version)
+    return version
+
+
+def invalidate_ingredient_autocomplete() -> None:
+    """Сбрасывает деревья во всех процессах, разделяющих кеш."""
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def get_trie() -> IngredientTrie:
+    global _trie
+
+    version = get_catalog_version()
+    trie = _trie
+    if trie is not None and trie.version == version:
+        return trie
+
+    with _trie_lock:
+        if _trie is None or _trie.version != version:
+            _trie = IngredientTrie(
+                Ingredient.objects.order_by("name").values_list(
+                    "id", "name"
+                ),
+                version
+            )
+        return _trie
+
+
+def search_ingredient_ids_in_db(value: str, limit: int) -> list[int]:
+    queryset = Ingredient.objects.annotate(name_lower=Lower("name"))
+    ingredient_ids = list(
+        queryset.filter(
+            name_lower__startswith=value
+        ).order_by("name_lower").values_list("id", flat=True)[:limit]
+    )
+
+    if len(ingredient_ids) < limit:
+        ingredient_ids += queryset.filter(
+            name_lower__contains=value
+        ).exclude(
+            name_lower__startswith=value
+        ).order_by("name_lower").values_list(
+            "id", flat=True
+        )[:limit - len(ingredient_ids)]
+
+    return ingredient_ids
+
+
+def search_ingredient_ids(
+    value: str,
+    limit: int = AUTOCOMPLETE_LIMIT
+) -> list[int]:
+    """
+    Id ингредиентов для автодополнения.
+
+    Сначала идут совпадения по началу названия, затем по подстроке,
+    всего не больше limit. Поиск идет по префиксному дереву в памяти,
+    а если оно отключено или кеш не общий - по индексу LOWER(name).
+    """
+    value = value.strip().lower()
+    if not value:
+        return []
+
+    if not USE_TRIE:
+        return search_ingredient_ids_in_db(value, limit)
+
+    trie = get_trie()
+    ingredient_ids = trie.starts_with(value, limit)
+    if len(ingredient_ids) < limit:
+        ingredient_ids += trie.contains(
+            value,
+            limit - len(ingredient_ids),
+            exclude=set(ingredient_ids)
+        )
+    return ingredient_ids
@@ -0,0 +1,215 @@
+import csv
+import zipfile
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape
+
+COLUMNS = [
+    "Номер ингредиента", "Название",
+    "Мера измерения", "Количество ингредиента"
+]
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'content-types">'
+    '<Default Extension="rels" ContentType="application/'
+    'vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType='
+    '"application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/'
+    'main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships">'
+    '<sheets><sheet name="Shopping list" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+XLSX_SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+    '2006/main"><sheetData>'
+)
+
+XLSX_SHEET_FOOTER = '</sheetData></worksheet>'
+
+
+def get_row(number_ingredient: int, ingredient: dict) -> list:
+    return [
+        number_ingredient,
+        ingredient["name"],
+        ingredient["measurement_unit"],
+        ingredient["total_amount"],
+    ]
+
+
+class ShoppingListExporter(ABC):
+    """
+    Базовый экспортер списка покупок.
+
+    Строки берутся из итератора по курсору БД и отдаются
+    клиенту частями, файл целиком в памяти не собирается.
+    """
+    content_type = "application/octet-stream"
+    extension = ""
+
+    def __init__(self, ingredients: Iterable[dict]):
+        self.ingredients = ingredients
+
+    @property
+    def filename(self) -> str:
+        return f"shopping-list.{self.extension}"
+
+    def rows(self) -> Iterator[list]:
+        for number_ingredient, ingredient in enumerate(
+            self.ingredients, start=1
+        ):
+            yield get_row(number_ingredient, ingredient)
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[bytes]:
+        """Части файла в байтах."""
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class CSVExporter(ShoppingListExporter):
+    content_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __iter__(self):
+        writer = csv.writer(Echo())
+        # BOM нужен Excel, чтобы открыть файл в UTF-8.
+        yield "\ufeff".encode("utf-8")
+        yield writer.writerow(COLUMNS).encode("utf-8")
+        for row in self.rows():
+            yield writer.writerow(row).encode("utf-8")
+
+
+class TextExporter(ShoppingListExporter):
+    content_type = "text/plain; charset=utf-8"
+    extension = "txt"
+
+    def __iter__(self):
+        yield "Список покупок\n\n".encode("utf-8")
+        for number_ingredient, name, measurement_unit, amount in self.rows():
+            yield (
+                f"{number_ingredient}. {name} ({measurement_unit})"
+                f" — {amount}\n"
+            ).encode("utf-8")
+
+
+class StreamBuffer:
+    """
+    Несмещаемый поток для zipfile.
+
+    ZipFile пишет в него сжатые данные, а генератор
+    забирает накопленные байты после каждой строки.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class XLSXExporter(ShoppingListExporter):
+    content_type = (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    extension = "xlsx"
+    columns = "ABCD"
+
+    def get_row_xml(self, row_num: int, row: list) -> str:
+        cells = []
+        for column, value in zip(self.columns, row):
+            reference = f"{column}{row_num}"
+            if isinstance(value, int):
+                cells.append(f'<c r="{reference}"><v>{value}</v></c>')
+            else:
+                cells.append(
+                    f'<c r="{reference}" t="inlineStr">'
+                    f'<is><t>{escape(str(value))}</t></is></c>'
+                )
+        return f'<row r="{row_num}">{"".join(cells)}</row>'
+
+    def __iter__(self):
+        stream = StreamBuffer()
+        with zipfile.ZipFile(
+            stream, "w", compression=zipfile.ZIP_DEFLATED
+        ) as archive:
+            archive.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+            archive.writestr("_rels/.rels", XLSX_ROOT_RELS)
+            archive.writestr("xl/workbook.xml", XLSX_WORKBOOK)
+            archive.writestr(
+                "xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS
+            )
+            yield stream.pop()
+
+            with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+                sheet.write(XLSX_SHEET_HEADER.encode("utf-8"))
+                sheet.write(self.get_row_xml(1, COLUMNS).encode("utf-8"))
+                for row_num, row in enumerate(self.rows(), start=2):
+                    sheet.write(
+                        self.get_row_xml(row_num, row).encode("utf-8")
+                    )
+                    chunk = stream.pop()
+                    if chunk:
+                        yield chunk
+                sheet.write(XLSX_SHEET_FOOTER.encode("utf-8"))
+
+        yield stream.pop()
+
+
+EXPORTERS = {
+    "xlsx": XLSXExporter,
+    "csv": CSVExporter,
+    "txt": TextExporter,
+}
+
+
+def get_exporter(export_format: str) -> type[ShoppingListExporter]:
+    return EXPORTERS[export_format]
@@ -0,0 +1,82 @@
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import QuerySet
+
+from core.caches import is_shared_cache
+from users.models import Subscribe
+
+# Сброс в локальном кеше процесса не виден другим воркерам, и они
+# отдавали бы ленту без новых подписок и рецептов, поэтому без общего
+# кеша лента строится в каждом запросе.
+FEED_CACHE_TIMEOUT = getattr(
+    settings, "RECIPE_FEED_CACHE_TIMEOUT", 300
+) if is_shared_cache() else 0
+
+INVALIDATION_BATCH_SIZE = 1000
+
+
+def get_feed_cache_key(user_id: int) -> str:
+    return f"recipes:feed:{user_id}"
+
+
+def filter_feed(queryset: QuerySet, user) -> QuerySet:
+    """Рецепты авторов, на которых подписан пользователь."""
+    return queryset.filter(
+        author__in=Subscribe.objects.filter(user=user).values("author")
+    )
+
+
+def get_feed_head_ids(user_id: int, build: Callable[[], list]) -> list:
+    """
+    Id первых рецептов ленты из кеша.
+
+    Кеш сбрасывается, когда автор из подписок публикует
+    или удаляет рецепт и когда меняются подписки.
+    """
+    cache_key = get_feed_cache_key(user_id)
+    recipe_ids = cache.get(cache_key)
+    if recipe_ids is None:
+        recipe_ids = build()
+        cache.set(cache_key, recipe_ids, timeout=FEED_CACHE_TIMEOUT)
+    return recipe_ids
+
+
+def delete_feeds(user_ids: Iterable[int]) -> None:
+    cache_keys = []
+    for user_id in user_ids:
+        cache_keys.append(get_feed_cache_key(user_id))
+        if len(cache_keys) >= INVALIDATION_BATCH_SIZE:
+            cache.delete_many(cache_keys)
+            cache_keys = []
+    cache.delete_many(cache_keys)
+
+
+def invalidate_feeds(user_ids: Iterable[int]) -> None:
+    """
+    Сбрасывает кеш лент после коммита транзакции.
+
+    Сброс до коммита не помогает: параллельный запрос успеет
+    собрать ленту по старым данным и закешировать ее.
+    """
+    if not FEED_CACHE_TIMEOUT:
+        return
+
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: delete_feeds(user_ids))
+
+
+def invalidate_subscriber_feeds(author_id: int) -> None:
+    """Сбрасывает после коммита ленты подписчиков автора."""
+    if not FEED_CACHE_TIMEOUT:
+        return
+
+    transaction.on_commit(
+        lambda: delete_feeds(
+            Subscribe.objects.filter(
+                author_id=author_id
+            ).values_list("user_id", flat=True).iterator()
+        )
+    )
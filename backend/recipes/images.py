@@ -0,0 +1,181 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from core.tasks import enqueue
+from recipes.models import Recipe
+from recipes.utils import recipes_updated
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    "thumb": (160, 160),
+    "card": (480, 480),
+    "full": (1280, 1280),
+}
+
+FORMATS = {
+    "webp": "WEBP",
+    "jpeg": "JPEG",
+}
+
+RENDITIONS_DIR = "recipes/images/renditions"
+
+QUALITY = getattr(settings, "IMAGE_RENDITION_QUALITY", 80)
+
+WORKERS = getattr(settings, "IMAGE_RENDITION_WORKERS", 2)
+
+IN_QUEUE = getattr(settings, "IMAGE_RENDITION_QUEUE", False)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_rendition_path(image_name: str, rendition: str, fmt: str) -> str:
+    stem = PurePosixPath(image_name).stem
+    return f"{RENDITIONS_DIR}/{stem}_{rendition}.{fmt}"
+
+
+def render(image: Image.Image, size: tuple[int, int], fmt: str) -> bytes:
+    rendition = image.copy()
+    rendition.thumbnail(size, Image.LANCZOS)
+    buffer = BytesIO()
+    rendition.save(buffer, FORMATS[fmt], quality=QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def delete_renditions(renditions: dict) -> None:
+    for rendition in RENDITIONS:
+        for path in renditions.get(rendition, {}).values():
+            default_storage.delete(path)
+
+
+def discard_renditions(recipe: Recipe) -> None:
+    """
+    Убирает у рецепта копии прежней картинки.
+
+    Файлы удаляются после коммита, чтобы откат транзакции
+    не оставил ссылки на удаленные файлы.
+    """
+    renditions = recipe.image_renditions
+    Recipe.objects.filter(pk=recipe.pk).update(image_renditions={})
+    recipe.image_renditions = {}
+    transaction.on_commit(lambda: delete_renditions(renditions))
+
+
+def generate_renditions(recipe_id: int) -> Optional[dict]:
+    """
+    Создает уменьшенные копии картинки рецепта.
+
+    Оригинал декодируется один раз, из него получаются все размеры
+    в форматах WebP и JPEG. Пути сохраняются в image_renditions
+    вместе с именем оригинала, по которому они построены.
+    """
+    recipe = Recipe.objects.only("image", "image_renditions").filter(
+        pk=recipe_id
+    ).first()
+    if recipe is None or not recipe.image:
+        return None
+
+    source = recipe.image.name
+    with recipe.image.open("rb") as image_file:
+        with Image.open(image_file) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+
+    renditions = {"source": source}
+    for rendition, size in RENDITIONS.items():
+        renditions[rendition] = {}
+        for fmt in FORMATS:
+            path = get_rendition_path(source, rendition, fmt)
+            default_storage.delete(path)
+            renditions[rendition][fmt] = default_storage.save(
+                path, ContentFile(render(image, size, fmt))
+            )
+
+    updated = Recipe.objects.filter(pk=recipe_id, image=source).update(
+        image_renditions=renditions
+    )
+    if not updated:
+        # Картинку успели заменить, копии уже не нужны.
+        delete_renditions(renditions)
+        return None
+
+    recipes_updated.send(sender=Recipe, recipe_ids=[recipe_id])
+    if recipe.image_renditions.get("source") not in (None, source):
+        delete_renditions(recipe.image_renditions)
+    return renditions
+
+
+def run_safely(recipe_id: int) -> None:
+    """Копии не обязательны: ошибка пишется в лог, а не в ответ."""
+    try:
+        generate_renditions(recipe_id)
+    except Exception:
+        logger.exception(f"Image renditions failed for recipe {recipe_id}.")
+
+
+def run_in_worker(recipe_id: int) -> None:
+    try:
+        run_safely(recipe_id)
+    finally:
+        connections.close_all()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=WORKERS,
+                thread_name_prefix="image-renditions"
+            )
+        return _executor
+
+
+def schedule_renditions(recipe_id: int) -> None:
+    """
+    Ставит генерацию копий в пул потоков после коммита транзакции.
+
+    При IMAGE_RENDITION_QUEUE копии создает фоновый обработчик
+    run_worker: задача пишется в той же транзакции, что и рецепт.
+    При IMAGE_RENDITION_WORKERS = 0 копии создаются сразу
+    в текущем потоке.
+    """
+    if IN_QUEUE:
+        enqueue("generate_image_renditions", {"recipe_id": recipe_id})
+        return
+
+    if not WORKERS:
+        transaction.on_commit(lambda: run_safely(recipe_id))
+        return
+
+    transaction.on_commit(
+        lambda: get_executor().submit(run_in_worker, recipe_id)
+    )
+
+
+def needs_renditions(recipe: Recipe) -> bool:
+    return bool(recipe.image) and (
+        recipe.image_renditions.get("source") != recipe.image.name
+    )
+
+
+def get_rendition_urls(renditions: dict) -> dict:
+    return {
+        rendition: {
+            fmt: default_storage.url(path)
+            for fmt, path in renditions[rendition].items()
+        }
+        for rendition in RENDITIONS
+        if rendition in renditions
+    }
@@ -0,0 +1,178 @@
+import csv
+import json
+import os
+from itertools import islice
+from typing import IO, Iterable, Iterator
+
+from django.db import transaction
+from django.dispatch import Signal
+
+from recipes.models import Ingredient
+
+BATCH_SIZE = 1000
+
+READ_CHUNK_SIZE = 64 * 1024
+
+CSV_HEADER = ("name", "measurement_unit")
+
+NAME_MAX_LENGTH = Ingredient._meta.get_field("name").max_length
+
+UNIT_MAX_LENGTH = Ingredient._meta.get_field("measurement_unit").max_length
+
+# Массовая загрузка не вызывает post_save, кеши сбрасываются по этому сигналу.
+ingredients_loaded = Signal()
+
+
+def iter_json_array(file: IO[str]) -> Iterator[dict]:
+    """
+    Объекты JSON-массива по одному, без чтения файла целиком.
+
+    Файл читается кусками, каждый объект разбирается raw_decode,
+    в памяти держится только незавершенный хвост.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    while True:
+        chunk = file.read(READ_CHUNK_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != "[":
+                    raise ValueError("JSON file must contain an array.")
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    if buffer[position:].strip():
+                        raise
+                    return
+                break
+            yield item
+        if not chunk:
+            return
+
+
+def read_json_rows(file: IO[str]) -> Iterator[tuple[str, str]]:
+    for item in iter_json_array(file):
+        yield item.get("name", ""), item.get("measurement_unit", "")
+
+
+def read_json_lines_rows(file: IO[str]) -> Iterator[tuple[str, str]]:
+    for line in file:
+        if line.strip():
+            item = json.loads(line)
+            yield item.get("name", ""), item.get("measurement_unit", "")
+
+
+def read_csv_rows(file: IO[str]) -> Iterator[tuple[str, str]]:
+    for number, row in enumerate(csv.reader(file)):
+        if number == 0 and tuple(row) == CSV_HEADER:
+            continue
+        yield tuple(row[:2]) if len(row) >= 2 else ("", "")
+
+
+READERS = {
+    ".csv": read_csv_rows,
+    ".json": read_json_rows,
+    ".jsonl": read_json_lines_rows,
+}
+
+
+def read_rows(file_path: str) -> Iterator[tuple[str, str]]:
+    """Строки (название, мера) из CSV, JSON или JSON Lines файла."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Unsupported ingredients file: {file_path}")
+
+    with open(file_path, encoding="utf-8", newline="") as file:
+        yield from READERS[extension](file)
+
+
+def load_batch(
+    rows: list[tuple[str, str]],
+    update: bool,
+    counts: dict
+) -> None:
+    units = {}
+    for name, measurement_unit in rows:
+        name = (name or "").strip()
+        measurement_unit = (measurement_unit or "").strip()
+        if (
+            not name
+            or not measurement_unit
+            or len(name) > NAME_MAX_LENGTH
+            or len(measurement_unit) > UNIT_MAX_LENGTH
+            or name in units
+        ):
+            counts["skipped"] += 1
+            continue
+        units[name] = measurement_unit
+
+    existing = Ingredient.objects.filter(name__in=units).only(
+        "pk", "name", "measurement_unit"
+    )
+    changed = []
+    for ingredient in existing:
+        measurement_unit = units.pop(ingredient.name)
+        if not update or ingredient.measurement_unit == measurement_unit:
+            counts["skipped"] += 1
+            continue
+        ingredient.measurement_unit = measurement_unit
+        changed.append(ingredient)
+
+    inserted = 0
+    with transaction.atomic():
+        Ingredient.objects.bulk_update(changed, ["measurement_unit"])
+        if units:
+            new_rows = Ingredient.objects.filter(name__in=units)
+            existed = new_rows.count()
+            # ignore_conflicts на случай параллельной загрузки тех же строк,
+            # пропущенные конфликты не попадают в число добавленных.
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in units.items()
+                ),
+                ignore_conflicts=True
+            )
+            inserted = new_rows.count() - existed
+
+    counts["updated"] += len(changed)
+    counts["inserted"] += inserted
+    counts["skipped"] += len(units) - inserted
+
+
+def load_ingredients(
+    rows: Iterable[tuple[str, str]],
+    batch_size: int = BATCH_SIZE,
+    update: bool = True
+) -> dict[str, int]:
+    """
+    Загружает ингредиенты пачками по batch_size строк.
+
+    Новые названия добавляются, у существующих обновляется мера
+    измерения (если update), пустые и повторные строки
+    пропускаются. Повторный запуск ничего не меняет.
+    Возвращает число добавленных, обновленных и пропущенных.
+    """
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        load_batch(batch, update, counts)
+
+    if counts["inserted"] or counts["updated"]:
+        ingredients_loaded.send(sender=Ingredient, counts=counts)
+    return counts
@@ -0,0 +1,39 @@
+import logging
+
+from django.core.management import BaseCommand
+
+from recipes.images import generate_renditions, needs_renditions
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает уменьшенные копии картинок рецептов, у которых"
+        " их еще нет. С --all пересоздает копии у всех рецептов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересоздать копии у всех рецептов"
+        )
+
+    def handle(self, *args, **options):
+        generated = 0
+        recipes = Recipe.objects.only("image", "image_renditions")
+        for recipe in recipes.iterator():
+            if not options["all"] and not needs_renditions(recipe):
+                continue
+            try:
+                if generate_renditions(recipe.pk):
+                    generated += 1
+            except Exception:
+                logger.exception(
+                    f"Image renditions failed for recipe {recipe.pk}."
+                )
+
+        logger.info(f"Image renditions generated for {generated} recipes.")
+        self.stdout.write(f"Обработано рецептов: {generated}")
@@ -1,52 +1,61 @@
-import json
 import logging
 import os
-from typing import Dict, List
 
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 
-from recipes.models import Ingredient
+from recipes.loaders import BATCH_SIZE, load_ingredients, read_rows
 
 logger = logging.getLogger(__name__)
 
 INGREDIENTS_DIR = getattr(settings, "INGREDIENTS_DIR", "")
 
-
-def read_json_file(file_name: str) -> List[Dict]:
-    file_path = os.path.join(INGREDIENTS_DIR, file_name)
-    try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-    except FileNotFoundError:
-        logger.error(f"Can't read json file {file_path}.")
-
-    return data
-
-
-def load_ingredients(file_name: str) -> None:
-    ingredients = read_json_file(file_name)
-    ingredient_objs: list[Ingredient] = []
-    seen_names = set()
-
-    for ingredient in ingredients:
-        name = ingredient["name"]
-        measurement_unit = ingredient["measurement_unit"]
-
-        if name not in seen_names:
-            seen_names.add(name)
-            ingredient_objs.append(
-                Ingredient(
-                    name=name,
-                    measurement_unit=measurement_unit
-                )
-            )
-
-    Ingredient.objects.bulk_create(ingredient_objs)
-    logger.info("Ingredients loaded into database.")
+DEFAULT_FILE_NAME = "ingredients.csv"
 
 
 class Command(BaseCommand):
+    help = (
+        "Загружает ингредиенты из CSV, JSON или JSON Lines файла."
+        " Файл читается потоком, повторный запуск не создает дублей."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "file_name",
+            nargs="?",
+            default=DEFAULT_FILE_NAME,
+            help="Путь к файлу или имя файла в INGREDIENTS_DIR"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE
+        )
+        parser.add_argument(
+            "--no-update",
+            action="store_true",
+            help="Не менять меру измерения у существующих ингредиентов"
+        )
+
     def handle(self, *args, **options):
-        logger.info('Загружаем json файл c ингредиентами')
-        load_ingredients("ingredients.json")
+        file_path = os.path.join(INGREDIENTS_DIR, options["file_name"])
+        if not os.path.isfile(file_path):
+            logger.error(f"Can't read ingredients file {file_path}.")
+            raise CommandError(f"Файл {file_path} не найден.")
+
+        logger.info(f"Загружаем ингредиенты из {file_path}")
+        try:
+            counts = load_ingredients(
+                read_rows(file_path),
+                batch_size=options["batch_size"],
+                update=not options["no_update"]
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        logger.info(f"Ingredients loaded into database: {counts}.")
+        self.stdout.write(
+            f"Добавлено: {counts['inserted']},"
+            f" обновлено: {counts['updated']},"
+            f" пропущено: {counts['skipped']}"
+        )
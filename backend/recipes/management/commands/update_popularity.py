@@ -0,0 +1,35 @@
+import logging
+
+from django.core.management import BaseCommand
+
+from recipes.popularity import BATCH_SIZE, update_popularity
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает популярность рецептов по избранному и корзинам."
+        " Запускается периодически, например из cron. Обычный запуск"
+        " учитывает только события после прошлого пересчета."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Пересчитать все окно, а не только новые события."
+        )
+
+    def handle(self, *args, **options):
+        updated = update_popularity(
+            batch_size=options["batch_size"],
+            full=options["full"]
+        )
+        logger.info(f"Popularity updated for {updated} recipes.")
+        self.stdout.write(f"Обновлено рецептов: {updated}")
@@ -0,0 +1,26 @@
+import logging
+
+from django.core.management import BaseCommand
+
+from recipes.search import BATCH_SIZE, update_all_search_vectors
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает поисковые векторы рецептов. Нужен после миграции"
+        " и после переименования тегов или ингредиентов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        updated = update_all_search_vectors(options["batch_size"])
+        logger.info(f"Search vectors updated for {updated} recipes.")
+        self.stdout.write(f"Обновлено рецептов: {updated}")
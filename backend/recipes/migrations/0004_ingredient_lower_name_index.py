@@ -0,0 +1,35 @@
+from django.db import migrations
+
+INDEX_NAME = "recipes_ingredient_lower_name_idx"
+
+
+def create_lower_name_index(apps, schema_editor):
+    # На PostgreSQL text_pattern_ops позволяет использовать индекс
+    # для LIKE 'префикс%' при любой локали базы.
+    opclass = (
+        " text_pattern_ops"
+        if schema_editor.connection.vendor == "postgresql"
+        else ""
+    )
+    schema_editor.execute(
+        f"CREATE INDEX {INDEX_NAME} "
+        f"ON recipes_ingredient (LOWER(name){opclass})"
+    )
+
+
+def drop_lower_name_index(apps, schema_editor):
+    schema_editor.execute(f"DROP INDEX {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_auto_20230928_2047'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_lower_name_index,
+            drop_lower_name_index
+        ),
+    ]
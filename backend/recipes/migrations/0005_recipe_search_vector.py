@@ -0,0 +1,42 @@
+# Generated by Django 3.2.3 on 2026-10-18 04:58
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+INDEX_NAME = "recipes_recipe_search_vector_idx"
+
+
+def create_search_vector_index(apps, schema_editor):
+    # GIN-индекс по tsvector есть только в PostgreSQL, на остальных
+    # СУБД поиск работает по подстроке и индекс не нужен.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX {INDEX_NAME} "
+        f"ON recipes_recipe USING GIN (search_vector)"
+    )
+
+
+def drop_search_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_ingredient_lower_name_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(
+            create_search_vector_index,
+            drop_search_vector_index
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.3 on 2026-10-18 05:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef("pk")}
+            ).order_by().values(field).annotate(
+                total=Count("pk")
+            ).values("total")
+        ),
+        0
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Favorite = apps.get_model("recipes", "Favorite")
+    ShoppingCart = apps.get_model("recipes", "ShoppingCart")
+    User = apps.get_model("users", "User")
+    Subscribe = apps.get_model("users", "Subscribe")
+
+    Recipe.objects.update(
+        favorites_count=count_related(Favorite, "recipe"),
+        in_carts_count=count_related(ShoppingCart, "recipe")
+    )
+    User.objects.update(
+        recipes_count=count_related(Recipe, "author"),
+        subscribers_count=count_related(Subscribe, "author")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipetag_tag_recipe_index'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество избранных'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество в корзинах покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-18 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity_updated',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Дата пересчета популярности'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
@@ -67,11 +68,53 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         db_index=True
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name="Количество избранных",
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name="Количество в корзинах покупок",
+        default=0,
+        editable=False
+    )
+    popularity = models.FloatField(
+        verbose_name="Популярность",
+        default=0,
+        db_index=True,
+        editable=False
+    )
+    popularity_updated = models.DateTimeField(
+        verbose_name="Дата пересчета популярности",
+        null=True,
+        editable=False
+    )
+    image_renditions = models.JSONField(
+        verbose_name="Уменьшенные копии картинки",
+        default=dict,
+        blank=True,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        verbose_name="Поисковый вектор",
+        null=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         ordering = ["pub_date"]
+        indexes = [
+            models.Index(
+                fields=["pub_date", "id"],
+                name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["author", "pub_date"],
+                name="recipe_author_pub_date_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -195,6 +238,12 @@ class RecipeTag(models.Model):
     class Meta:
         verbose_name = "Соответствие рецепта и тегов"
         verbose_name = "Соответствия рецепта и тегов"
+        indexes = [
+            models.Index(
+                fields=["tag", "recipe"],
+                name="recipetag_tag_recipe_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return (
@@ -0,0 +1,188 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Count, F, Max
+from django.db.models.functions import Greatest, TruncHour
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.utils import recipes_updated
+
+HALF_LIFE = timedelta(
+    hours=getattr(settings, "POPULARITY_HALF_LIFE_HOURS", 72)
+)
+
+WINDOW = timedelta(
+    days=getattr(settings, "POPULARITY_WINDOW_DAYS", 30)
+)
+
+FAVORITE_WEIGHT = 1.0
+
+SHOPPING_CART_WEIGHT = 0.5
+
+EVENT_WEIGHTS = (
+    (Favorite, FAVORITE_WEIGHT),
+    (ShoppingCart, SHOPPING_CART_WEIGHT),
+)
+
+# События группируются в БД по часу, возраст считается от середины часа.
+BUCKET = timedelta(hours=1)
+
+BATCH_SIZE = 1000
+
+
+def get_decay(age: timedelta) -> float:
+    """Вес события возрастом age: вдвое меньше за каждый HALF_LIFE."""
+    return 0.5 ** (age / HALF_LIFE)
+
+
+def get_bucket_middle(created: datetime) -> datetime:
+    """Середина часа события, как его группирует TruncHour в UTC."""
+    return created.astimezone(dt_timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    ) + BUCKET / 2
+
+
+def compute_scores(
+    since: datetime,
+    until: datetime,
+    now: datetime
+) -> dict[int, float]:
+    """
+    Вклад событий с датой в (since, until] в популярность на now.
+
+    Каждое добавление в избранное или в корзину дает свой вес,
+    затухающий со временем. События сводятся в БД GROUP BY
+    по рецепту и часу, в Python приходят только суммы.
+    """
+    scores = defaultdict(float)
+    for model, weight in EVENT_WEIGHTS:
+        buckets = model.objects.filter(
+            created__gt=since,
+            created__lte=until
+        ).annotate(
+            hour=TruncHour("created", tzinfo=dt_timezone.utc)
+        ).values(
+            "recipe_id", "hour"
+        ).annotate(
+            events=Count("pk")
+        ).values_list("recipe_id", "hour", "events")
+        for recipe_id, hour, events in buckets.iterator():
+            scores[recipe_id] += (
+                weight * events * get_decay(now - hour - BUCKET / 2)
+            )
+
+    return scores
+
+
+def get_last_update() -> Optional[datetime]:
+    return Recipe.objects.aggregate(
+        last_update=Max("popularity_updated")
+    )["last_update"]
+
+
+def save_scores(
+    scores: dict[int, float],
+    now: datetime,
+    batch_size: int,
+    relative: bool = False
+) -> None:
+    """
+    Записывает популярность рецептов scores одним UPDATE на пачку.
+
+    relative=True прибавляет scores к текущему значению.
+    """
+    recipe_ids = sorted(scores)
+    for start in range(0, len(recipe_ids), batch_size):
+        Recipe.objects.bulk_update(
+            [
+                Recipe(
+                    pk=recipe_id,
+                    popularity=(
+                        Greatest(F("popularity") + scores[recipe_id], 0.0)
+                        if relative else scores[recipe_id]
+                    ),
+                    popularity_updated=now
+                )
+                for recipe_id in recipe_ids[start:start + batch_size]
+            ],
+            ["popularity", "popularity_updated"]
+        )
+
+
+def update_popularity(
+    now: Optional[datetime] = None,
+    batch_size: int = BATCH_SIZE,
+    full: bool = False
+) -> int:
+    """
+    Записывает популярность в индексируемое поле Recipe.popularity.
+
+    Популярность хранится на момент последнего пересчета. Затухание
+    общее для всех рецептов, поэтому пересчет умножает ненулевые
+    значения на один коэффициент одним UPDATE, прибавляет события
+    после прошлого пересчета и вычитает вышедшие из окна WINDOW.
+    Обновляются только рецепты с такими событиями. Удаленные
+    события вычитает forget_event. full=True или давний прошлый
+    пересчет считают окно заново. Возвращает число рецептов,
+    пересчитанных по событиям.
+    """
+    now = now or timezone.now()
+    updated = calculate_popularity(now, batch_size, full)
+    # Порядок ?ordering=-popularity меняется у всех списков рецептов.
+    recipes_updated.send(sender=Recipe, recipe_ids=None)
+    return updated
+
+
+def calculate_popularity(
+    now: datetime,
+    batch_size: int,
+    full: bool
+) -> int:
+    last_update = get_last_update()
+    if full or last_update is None or now - last_update >= WINDOW:
+        scores = compute_scores(now - WINDOW, now, now)
+        stale_ids = set(
+            Recipe.objects.filter(
+                popularity__gt=0
+            ).values_list("pk", flat=True)
+        ) - scores.keys()
+        scores.update(dict.fromkeys(stale_ids, 0.0))
+        save_scores(scores, now, batch_size)
+        return len(scores)
+
+    Recipe.objects.filter(popularity__gt=0).update(
+        popularity=F("popularity") * get_decay(now - last_update),
+        popularity_updated=now
+    )
+    scores = compute_scores(last_update, now, now)
+    for recipe_id, score in compute_scores(
+        last_update - WINDOW, now - WINDOW, now
+    ).items():
+        scores[recipe_id] -= score
+    save_scores(scores, now, batch_size, relative=True)
+    return len(scores)
+
+
+def forget_event(recipe_id: int, created: datetime, weight: float) -> None:
+    """
+    Вычитает удаленное событие из популярности рецепта,
+    если прошлый пересчет его уже учел.
+    """
+    popularity_updated = Recipe.objects.filter(
+        pk=recipe_id
+    ).values_list("popularity_updated", flat=True).first()
+    if (
+        popularity_updated is None
+        or not popularity_updated - WINDOW < created <= popularity_updated
+    ):
+        return
+
+    score = weight * get_decay(
+        popularity_updated - get_bucket_middle(created)
+    )
+    Recipe.objects.filter(
+        pk=recipe_id, popularity_updated=popularity_updated
+    ).update(popularity=Greatest(F("popularity") - score, 0.0))
@@ -0,0 +1,157 @@
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import (Case, Exists, ExpressionWrapper, F,
+                              IntegerField, OuterRef, Q, QuerySet, Subquery,
+                              Value, When)
+
+from recipes.models import Recipe, RecipeIngredient, RecipeTag
+
+SEARCH_CONFIG = getattr(settings, "RECIPE_SEARCH_CONFIG", "russian")
+
+BATCH_SIZE = 1000
+
+
+def is_full_text_search_supported() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def get_search_vector():
+    """
+    Поисковый вектор рецепта.
+
+    Вес A - название, B - теги и ингредиенты, C - описание.
+    """
+    tag_names = RecipeTag.objects.filter(
+        recipe=OuterRef("pk")
+    ).values("recipe").annotate(
+        names=StringAgg("tag__name", " ")
+    ).values("names")
+    ingredient_names = RecipeIngredient.objects.filter(
+        recipe=OuterRef("pk")
+    ).values("recipe").annotate(
+        names=StringAgg("ingredient__name", " ")
+    ).values("names")
+
+    return (
+        SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(Subquery(tag_names), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(ingredient_names),
+            weight="B",
+            config=SEARCH_CONFIG
+        )
+        + SearchVector("text", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(recipe_ids: Iterable[int]) -> None:
+    """Пересчитывает search_vector у рецептов. Только для PostgreSQL."""
+    if not is_full_text_search_supported():
+        return
+
+    Recipe.objects.filter(pk__in=list(recipe_ids)).update(
+        search_vector=get_search_vector()
+    )
+
+
+def update_search_vectors_in_batches(
+    recipes: QuerySet,
+    batch_size: int = BATCH_SIZE
+) -> int:
+    """Пересчитывает search_vector у рецептов recipes пачками по id."""
+    if not is_full_text_search_supported():
+        return 0
+
+    updated = 0
+    last_id = 0
+    while True:
+        recipe_ids = list(
+            recipes.filter(pk__gt=last_id).order_by(
+                "pk"
+            ).values_list("pk", flat=True).distinct()[:batch_size]
+        )
+        if not recipe_ids:
+            return updated
+
+        update_search_vectors(recipe_ids)
+        updated += len(recipe_ids)
+        last_id = recipe_ids[-1]
+
+
+def update_all_search_vectors(batch_size: int = BATCH_SIZE) -> int:
+    return update_search_vectors_in_batches(Recipe.objects.all(), batch_size)
+
+
+def update_tag_search_vectors(tag_id: int) -> int:
+    """Пересчитывает вектор рецептов с тегом, например после переименования."""
+    return update_search_vectors_in_batches(
+        Recipe.objects.filter(recipes_tags__tag_id=tag_id)
+    )
+
+
+def update_ingredient_search_vectors(ingredient_id: int) -> int:
+    """Пересчитывает вектор рецептов с ингредиентом."""
+    return update_search_vectors_in_batches(
+        Recipe.objects.filter(recipes_ingredients__ingredient_id=ingredient_id)
+    )
+
+
+def search_recipes_full_text(queryset: QuerySet, value: str) -> QuerySet:
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type="websearch")
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F("search_vector"), query)
+    )
+
+
+def search_recipes_by_substring(queryset: QuerySet, value: str) -> QuerySet:
+    """
+    Переносимый поиск для SQLite и других СУБД.
+
+    Каждое слово должно встретиться в названии, описании, тегах
+    или ингредиентах. Ранг повторяет веса полнотекстового поиска.
+    """
+    search_rank = Value(0)
+    for term in value.split():
+        in_name = Q(name__icontains=term)
+        in_text = Q(text__icontains=term)
+        in_tags = Exists(
+            RecipeTag.objects.filter(
+                recipe=OuterRef("pk"),
+                tag__name__icontains=term
+            )
+        )
+        in_ingredients = Exists(
+            RecipeIngredient.objects.filter(
+                recipe=OuterRef("pk"),
+                ingredient__name__icontains=term
+            )
+        )
+        queryset = queryset.filter(
+            in_name | in_text | in_tags | in_ingredients
+        )
+        search_rank = (
+            search_rank
+            + Case(When(in_name, then=Value(4)), default=Value(0))
+            + Case(When(in_tags, then=Value(2)), default=Value(0))
+            + Case(When(in_ingredients, then=Value(2)), default=Value(0))
+            + Case(When(in_text, then=Value(1)), default=Value(0))
+        )
+
+    return queryset.annotate(
+        search_rank=ExpressionWrapper(search_rank, IntegerField())
+    )
+
+
+def search_recipes(queryset: QuerySet, value: str) -> QuerySet:
+    """Рецепты по запросу, от наиболее релевантных к наименее."""
+    if is_full_text_search_supported():
+        queryset = search_recipes_full_text(queryset, value)
+    else:
+        queryset = search_recipes_by_substring(queryset, value)
+
+    return queryset.order_by("-search_rank", "-pub_date")
@@ -0,0 +1,122 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.counters import change_counter
+from recipes.autocomplete import invalidate_ingredient_autocomplete
+from recipes.feed import invalidate_subscriber_feeds
+from recipes.images import (delete_renditions, discard_renditions,
+                            needs_renditions, schedule_renditions)
+from recipes.loaders import ingredients_loaded
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.popularity import (FAVORITE_WEIGHT, SHOPPING_CART_WEIGHT,
+                                forget_event)
+from recipes.search import (update_ingredient_search_vectors,
+                            update_tag_search_vectors)
+from recipes.user_state import invalidate_user_state
+from recipes.utils import invalidate_tag_ids
+from users.models import User
+
+
+@receiver([post_save, post_delete, ingredients_loaded], sender=Ingredient)
+def invalidate_ingredient_catalog(**kwargs):
+    invalidate_ingredient_autocomplete()
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_tag_catalog(**kwargs):
+    invalidate_tag_ids()
+
+
+def is_name_changed(created: bool, update_fields) -> bool:
+    """У существующей записи могло измениться название."""
+    return not created and (update_fields is None or "name" in update_fields)
+
+
+@receiver(post_save, sender=Tag)
+def update_tag_recipes_search(instance, created, update_fields, **kwargs):
+    if is_name_changed(created, update_fields):
+        update_tag_search_vectors(instance.pk)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes_search(
+    instance, created, update_fields, **kwargs
+):
+    if is_name_changed(created, update_fields):
+        update_ingredient_search_vectors(instance.pk)
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorites_count(instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, "favorites_count", 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorites_count(instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, "favorites_count", -1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def increment_in_carts_count(instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, "in_carts_count", 1)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_in_carts_count(instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, "in_carts_count", -1)
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=ShoppingCart)
+def invalidate_recipe_user_state(instance, **kwargs):
+    invalidate_user_state(instance.user_id)
+
+
+@receiver(post_delete, sender=Favorite)
+def forget_favorite_popularity(instance, **kwargs):
+    forget_event(instance.recipe_id, instance.created, FAVORITE_WEIGHT)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def forget_shopping_cart_popularity(instance, **kwargs):
+    forget_event(instance.recipe_id, instance.created, SHOPPING_CART_WEIGHT)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, "recipes_count", 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    change_counter(User, instance.author_id, "recipes_count", -1)
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_new_recipe_feeds(instance, created, **kwargs):
+    if created:
+        invalidate_subscriber_feeds(instance.author_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_deleted_recipe_feeds(instance, **kwargs):
+    invalidate_subscriber_feeds(instance.author_id)
+
+
+@receiver(post_save, sender=Recipe)
+def update_image_renditions(instance, **kwargs):
+    if needs_renditions(instance):
+        if instance.image_renditions:
+            discard_renditions(instance)
+        schedule_renditions(instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_image_renditions(instance, **kwargs):
+    if instance.image_renditions:
+        renditions = instance.image_renditions
+        transaction.on_commit(lambda: delete_renditions(renditions))
@@ -0,0 +1,67 @@
+import io
+import tempfile
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+from core.tasks import register_task
+from recipes.exporters import get_exporter
+from recipes.images import generate_renditions
+from recipes.utils import get_shopping_list
+from users.models import User
+
+EXPORTS_DIR = "exports/shopping-lists"
+
+
+def delete_export(result: dict) -> None:
+    if result and result.get("file"):
+        default_storage.delete(result["file"])
+
+
+@register_task("export_shopping_list", cleanup=delete_export)
+def export_shopping_list(user_id: int, export_format: str) -> dict:
+    """
+    Выгружает список покупок во временный файл и сохраняет его
+    в хранилище. Ссылка на файл отдается в результате задачи.
+    """
+    exporter = get_exporter(export_format)(
+        get_shopping_list(User.objects.get(pk=user_id)).iterator()
+    )
+    with tempfile.TemporaryFile() as file:
+        for chunk in exporter:
+            file.write(chunk)
+        size = file.tell()
+        file.seek(0)
+        name = default_storage.save(
+            f"{EXPORTS_DIR}/{uuid.uuid4().hex}.{exporter.extension}",
+            File(file)
+        )
+
+    return {
+        "file": name,
+        "filename": exporter.filename,
+        "content_type": exporter.content_type,
+        "size": size,
+    }
+
+
+@register_task("generate_image_renditions")
+def generate_image_renditions(recipe_id: int) -> dict:
+    renditions = generate_renditions(recipe_id)
+    return {"renditions": renditions is not None}
+
+
+@register_task("reconcile_counters")
+def reconcile_counters() -> dict:
+    output = io.StringIO()
+    call_command("reconcile_counters", stdout=output)
+    return {"output": output.getvalue()}
+
+
+@register_task("update_popularity")
+def update_popularity() -> dict:
+    output = io.StringIO()
+    call_command("update_popularity", stdout=output)
+    return {"output": output.getvalue()}
@@ -0,0 +1,83 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.caches import is_shared_cache
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscribe
+
+# Сброс в локальном кеше процесса не виден другим воркерам, и они
+# отдавали бы старые флаги, поэтому без общего кеша состояние
+# загружается заново в каждом запросе.
+USER_STATE_TIMEOUT = getattr(
+    settings, "USER_STATE_CACHE_TIMEOUT", 600
+) if is_shared_cache() else 0
+
+
+class UserRecipeState:
+    """
+    Id избранных рецептов, рецептов в корзине и авторов из подписок.
+
+    Флаги is_favorited, is_in_shopping_cart и is_subscribed
+    проставляются по этим множествам при сериализации, без
+    подзапросов Exists на каждую строку выдачи.
+    """
+    __slots__ = ("favorite_ids", "cart_ids", "subscribed_author_ids")
+
+    def __init__(self, favorite_ids, cart_ids, subscribed_author_ids):
+        self.favorite_ids = frozenset(favorite_ids)
+        self.cart_ids = frozenset(cart_ids)
+        self.subscribed_author_ids = frozenset(subscribed_author_ids)
+
+    def __reduce__(self):
+        return (
+            UserRecipeState,
+            (self.favorite_ids, self.cart_ids, self.subscribed_author_ids)
+        )
+
+
+def get_user_state_key(user_id: int) -> str:
+    return f"recipes:user_state:{user_id}"
+
+
+def load_user_state(user) -> UserRecipeState:
+    return UserRecipeState(
+        Favorite.objects.filter(user=user).values_list(
+            "recipe_id", flat=True
+        ),
+        ShoppingCart.objects.filter(user=user).values_list(
+            "recipe_id", flat=True
+        ),
+        Subscribe.objects.filter(user=user).values_list(
+            "author_id", flat=True
+        )
+    )
+
+
+def get_user_state(user) -> Optional[UserRecipeState]:
+    """Состояние пользователя из кеша, для анонимного - None."""
+    if not user.is_authenticated:
+        return None
+    if not USER_STATE_TIMEOUT:
+        return load_user_state(user)
+
+    cache_key = get_user_state_key(user.pk)
+    state = cache.get(cache_key)
+    if state is None:
+        state = load_user_state(user)
+        cache.set(cache_key, state, timeout=USER_STATE_TIMEOUT)
+    return state
+
+
+def invalidate_user_state(user_id: int) -> None:
+    """
+    Сбрасывает состояние сразу и еще раз после коммита.
+
+    Повторный сброс убирает состояние, которое параллельный
+    запрос мог прочитать из БД до коммита изменения.
+    """
+    cache_key = get_user_state_key(user_id)
+    cache.delete(cache_key)
+    transaction.on_commit(lambda: cache.delete(cache_key))
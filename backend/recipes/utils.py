@@ -1,85 +1,59 @@
-import xlwt
+from django.core.cache import cache
+from django.db.models import F, QuerySet, Sum
+from django.dispatch import Signal
 
-from recipes.models import Recipe
+from core.caches import is_shared_cache
+from recipes.models import RecipeIngredient, Tag
 
+TAG_SLUGS_CACHE_KEY = "recipes:tag_ids_by_slug"
 
-def add_recipe_row(ws, row_num, recipe):
-    row = [
-        recipe.name,
-        recipe.author.username,
-        recipe.text,
-        recipe.cooking_time
-    ]
+# Сброс в локальном кеше процесса не виден другим воркерам, и новый
+# тег не находился бы в ?tags= до перезапуска, поэтому без общего
+# кеша соответствие загружается из БД в каждом запросе.
+CACHE_TAG_IDS = is_shared_cache()
 
-    font_style = xlwt.XFStyle()
+# Запись рецептов через .update() не вызывает post_save, кеш ответов
+# сбрасывается по этому сигналу: recipe_ids - измененные рецепты,
+# None - изменился порядок рецептов в списках.
+recipes_updated = Signal()
 
-    for col_num, cell_value in enumerate(row):
-        ws.write(row_num, col_num, cell_value, font_style)
 
+def get_shopping_list(user) -> QuerySet:
+    """
+    Сводный список покупок пользователя.
 
-def add_ingredient_row(ws, row_num, recipe_ingredient, number_ingredient):
-    row = [
-        str(number_ingredient),
-        recipe_ingredient.ingredient.name,
-        recipe_ingredient.ingredient.measurement_unit,
-        str(recipe_ingredient.amount),
-    ]
+    Один сгруппированный запрос к RecipeIngredient по рецептам
+    из корзины покупок: количество суммируется по ингредиенту
+    и мере измерения.
+    """
+    return (
+        RecipeIngredient.objects
+        .filter(recipe__shoppingcart__user=user)
+        .values(
+            name=F("ingredient__name"),
+            measurement_unit=F("ingredient__measurement_unit")
+        )
+        .annotate(total_amount=Sum("amount"))
+        .order_by("name")
+    )
 
-    font_style = xlwt.XFStyle()
 
-    for col_num, cell_value in enumerate(row):
-        ws.write(row_num, col_num, cell_value, font_style)
+def get_tag_ids_by_slug() -> dict[str, int]:
+    """Соответствие слагов тегов их id, закешированное до изменения тегов."""
+    if not CACHE_TAG_IDS:
+        return dict(Tag.objects.values_list("slug", "id"))
 
+    tag_ids = cache.get(TAG_SLUGS_CACHE_KEY)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list("slug", "id"))
+        cache.set(TAG_SLUGS_CACHE_KEY, tag_ids, timeout=None)
+    return tag_ids
 
-def add_ingredients_titles(ws, row_num):
-    columns = [
-        "Номер ингредиента", "Название",
-        "Мера измерения", "Количество ингредиента"
-    ]
-    font_style = xlwt.XFStyle()
-    font_style.font.bold = True
 
-    for col_num, column_title in enumerate(columns):
-        ws.write(row_num, col_num, column_title, font_style)
+def get_tag_ids(slugs: list[str]) -> list[int]:
+    tag_ids = get_tag_ids_by_slug()
+    return [tag_ids[slug] for slug in slugs if slug in tag_ids]
 
 
-def add_recipe_titles(ws, row_num):
-    columns = [
-        "Название рецепта", "Автор",
-        "Описание", "Время приготовления"
-    ]
-    font_style = xlwt.XFStyle()
-    font_style.font.bold = True
-
-    for col_num, column_title in enumerate(columns):
-        ws.write(row_num, col_num, column_title, font_style)
-
-
-def get_xls_recipes_file(recipes: list[Recipe]) -> xlwt.Workbook:
-    wb = xlwt.Workbook(encoding="utf-8")
-    ws = wb.add_sheet("Recipes")
-
-    row_num = 0
-
-    for recipe in recipes:
-        add_recipe_titles(ws, row_num)
-        row_num += 1
-
-        add_recipe_row(ws, row_num, recipe)
-        row_num += 1
-
-        add_ingredients_titles(ws, row_num)
-        row_num += 1
-
-        number_ingredient = 1
-        for recipe_ingredient in recipe.recipes_ingredients.all():
-            add_ingredient_row(
-                ws,
-                row_num,
-                recipe_ingredient,
-                number_ingredient
-            )
-            row_num += 1
-            number_ingredient += 1
-
-    return wb
+def invalidate_tag_ids() -> None:
+    cache.delete(TAG_SLUGS_CACHE_KEY)
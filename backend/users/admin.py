@@ -6,7 +6,10 @@ from .models import Subscribe, User
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
-    list_display = ["username", "email", "first_name", "last_name", "is_staff"]
+    list_display = [
+        "username", "email", "first_name", "last_name", "is_staff",
+        "recipes_count", "subscribers_count"
+    ]
     list_filter = ["is_staff"]
     fieldsets = [
         [None, {"fields": ["email", "password"]}],
@@ -48,6 +48,17 @@ class User(AbstractUser):
         },
     )
 
+    recipes_count = models.PositiveIntegerField(
+        verbose_name="Количество рецептов",
+        default=0,
+        editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name="Количество подписчиков",
+        default=0,
+        editable=False
+    )
+
     def __str__(self) -> str:
         return self.username
 
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.counters import change_counter
+from recipes.feed import invalidate_feeds
+from recipes.user_state import invalidate_user_state
+from users.models import Subscribe, User
+
+
+@receiver(post_save, sender=Subscribe)
+def increment_subscribers_count(instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, "subscribers_count", 1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def decrement_subscribers_count(instance, **kwargs):
+    change_counter(User, instance.author_id, "subscribers_count", -1)
+
+
+@receiver([post_save, post_delete], sender=Subscribe)
+def invalidate_subscriber_caches(instance, **kwargs):
+    invalidate_feeds([instance.user_id])
+    invalidate_user_state(instance.user_id)